@@ -0,0 +1,356 @@
+"""
+Benchmark of the load paths of the dblink pipeline on the local database.
+Every case runs the whole Pipeline.run() in a fresh interpreter against the
+synthetic data. Source table behind the link is emulated by the attached
+database in SQLite and by the separate schema in PostgreSQL.
+
+Run from the repository root:
+
+    python benchmarks/loads.py --rows 10000 100000 --output loads.json
+    python benchmarks/loads.py --mode merge --url postgresql://u:p@h/db
+    python benchmarks/loads.py --baseline loads.json --tolerance 0.25
+
+Modes are insert, duplicates (insert with the duplicate and primary key
+checks), update, merge, delete (delete all and insert), truncate and swap
+(reload through the new table, truncate where it is not supported). With the
+baseline the script exits with the code 1 when the median time of any
+case is worse than the baseline more than the tolerance allows.
+"""
+import os
+import re
+import sys
+import json
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+import statistics
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+modes = [
+    'insert', 'duplicates', 'update', 'merge', 'delete', 'truncate', 'swap']
+
+def generate(rows, skew, duplicates, width, columns, seed, start=0):
+    """
+    Generate the rows of the source table by chunks. Every key is unique
+    except the duplicates which repeat the earlier rows. Skew above one
+    makes the duplicates concentrate on the first keys.
+    """
+    generator = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    moment = datetime.datetime(2020, 1, 1)
+
+    chunk = []
+    made = []
+    for i in range(rows):
+        if len(made) > 0 and generator.random() < duplicates:
+            index = int(len(made) * generator.random() ** skew)
+            row = dict(made[index])
+        else:
+            row = {
+                'id': start + i,
+                'amount': round(generator.uniform(0, 100000), 2),
+                'created': moment + datetime.timedelta(seconds=i)}
+            for j in range(columns):
+                row[f'c{j}'] = ''.join(
+                    generator.choice(alphabet) for _ in range(width))
+            # Only a window of rows is kept for the duplicates.
+            if len(made) < 100000:
+                made.append(row)
+        chunk.append(row)
+        if len(chunk) == 10000:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+def get_columns(width, columns):
+    """Get the column descriptions of the pipeline configuration."""
+    result = [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'amount', 'type': 'numeric', 'precision': 18, 'scale': 2},
+        {'name': 'created', 'type': 'timestamp'}]
+    for j in range(columns):
+        result.append({'name': f'c{j}', 'type': 'varchar', 'length': width})
+    return result
+
+def get_config(case, mode):
+    """Get the pipeline configuration for the mode."""
+    columns = get_columns(case['width'], case['columns'])
+    names = [column['name'] for column in columns if column['name'] != 'id']
+    config = {
+        'query': {'table': 'items', 'schema': case['schema'],
+                  'select_all': False},
+        'columns': columns,
+        'log': {'async': case['async']}}
+    if mode == 'duplicates':
+        config['primary_key'] = ['id']
+        config['duplicates'] = False
+    elif mode == 'update':
+        config['update'] = {'keys': ['id'], 'columns': names}
+    elif mode == 'merge':
+        config['merge'] = {'keys': ['id'], 'columns': names}
+    elif mode == 'delete':
+        config['delete'] = True
+    elif mode in ['truncate', 'swap']:
+        config['delete'] = mode
+    return config
+
+def connect(case, folder):
+    """Get the target database with the source schema prepared."""
+    import sqlalchemy as sql
+    import pypyrus_etl as etl
+
+    if case['url'] is None:
+        path = os.path.join(folder, 'target.db')
+        source = os.path.join(folder, 'source.db')
+        database = etl.Database('bench', credentials=f'sqlite:///{path}')
+
+        @sql.event.listens_for(database.engine, 'connect')
+        def attach(connection, record):
+            connection.execute(f'ATTACH DATABASE \'{source}\' AS src')
+        case['schema'] = 'src'
+    else:
+        database = etl.Database('bench', credentials=case['url'])
+        schema = f'etl_bench_{os.getpid()}'
+        for name in [schema, f'{schema}_src']:
+            database.connection.execute(
+                f'DROP SCHEMA IF EXISTS {name} CASCADE')
+            database.connection.execute(f'CREATE SCHEMA {name}')
+        database.release()
+        database.engine.dispose()
+
+        @sql.event.listens_for(database.engine, 'connect')
+        def search(connection, record):
+            cursor = connection.cursor()
+            cursor.execute(f'SET search_path TO {schema}')
+            cursor.close()
+        case['schema'] = f'{schema}_src'
+    return database
+
+def disconnect(database, case):
+    """Drop the schemas prepared for the case and close the connections."""
+    if case['url'] is not None:
+        schema = f'etl_bench_{os.getpid()}'
+        database.release()
+        with database.engine.connect() as connection:
+            for name in [schema, f'{schema}_src']:
+                connection.execute(f'DROP SCHEMA IF EXISTS {name} CASCADE')
+    database.engine.dispose()
+    pass
+
+def fill(database, case, rows, start=0, duplicates=None):
+    """Create and fill the source table."""
+    import sqlalchemy as sql
+
+    metadata = sql.MetaData()
+    columns = [
+        sql.Column('id', sql.Integer),
+        sql.Column('amount', sql.Numeric(18, 2)),
+        sql.Column('created', sql.DateTime)]
+    for j in range(case['columns']):
+        columns.append(sql.Column(f'c{j}', sql.String(case['width'])))
+    table = sql.Table('items', metadata, *columns, schema=case['schema'])
+    table.create(database.engine, checkfirst=True)
+
+    if duplicates is None:
+        duplicates = case['duplicates']
+    chunks = generate(
+        rows, case['skew'], duplicates, case['width'], case['columns'],
+        case['seed'] + start, start=start)
+    for chunk in chunks:
+        database.bulk_insert(table, chunk)
+    database.release()
+    return table
+
+def change(database, case, table):
+    """
+    Change the part of the source rows and add the new ones so update and
+    merge have both matched and not matched rows.
+    """
+    step = max(1, round(1 / case['change']))
+    update = table.update().\
+        where(table.c.id % step == 0).\
+        values(amount=table.c.amount + 1)
+    database.connection.execute(update)
+    if case['mode'] == 'merge':
+        fill(database, case, case['rows'] // step, start=case['rows'],
+             duplicates=0)
+    database.release()
+    pass
+
+def run_pipeline(database, case, mode):
+    """Run the pipeline and get the timings."""
+    import time
+    import pypyrus_etl as etl
+    from pypyrus_etl.pipelines.table.dblink.table.pipeline import Pipeline
+
+    table = etl.Table('items', schema=case['schema'], database=database)
+    config = get_config(case, mode)
+
+    start = time.perf_counter()
+    pipeline = Pipeline('items', database, table, database, config)
+    pipeline.run()
+    seconds = time.perf_counter() - start
+
+    if pipeline.log.status != 3:
+        raise RuntimeError(f'Pipeline finished with <{pipeline.log.status}>.')
+    return {
+        'seconds': seconds,
+        'stages': dict(pipeline.log.timings),
+        'records': dict(pipeline.log.counts)}
+
+def run_case(case):
+    """Prepare the data, run the pipeline once and print the result."""
+    folder = tempfile.mkdtemp(prefix='etl_bench_')
+    database = None
+    try:
+        database = connect(case, folder)
+        table = fill(database, case, case['rows'])
+        # Output table is loaded before the measured run. Merge makes it
+        # with the update id used by the update.
+        if case['mode'] in ['update', 'merge']:
+            run_pipeline(database, case, 'merge')
+            change(database, case, table)
+        elif case['mode'] in ['delete', 'truncate', 'swap']:
+            run_pipeline(database, case, 'insert')
+        result = run_pipeline(database, case, case['mode'])
+    finally:
+        if database is not None:
+            disconnect(database, case)
+        shutil.rmtree(folder, ignore_errors=True)
+    # Result line is told apart from the output of the pipeline log.
+    print(f'RESULT {json.dumps(result)}')
+    pass
+
+def measure(case, repeat):
+    """Run the case in fresh interpreters and collect the timings."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root, *filter(None, [env.get('PYTHONPATH')])])
+    script = os.path.abspath(__file__)
+
+    results = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, script, '--case', json.dumps(case)],
+            cwd=root, env=env, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True)
+        lines = [
+            line[7:] for line in result.stdout.splitlines()
+            if line.startswith('RESULT ')]
+        if result.returncode != 0 or len(lines) == 0:
+            # Exception line is taken over the notes printed after it.
+            errors = [
+                line for line in result.stderr.splitlines()
+                if re.match(r'^[\w.]+(Error|Exception)\b', line)]
+            error = errors[-1] if len(errors) > 0 \
+                else f'Exit code <{result.returncode}>.'
+            return {'error': error}
+        results.append(json.loads(lines[-1]))
+
+    timings = [result['seconds'] for result in results]
+    stages = {}
+    for result in results:
+        for stage, seconds in result['stages'].items():
+            stages.setdefault(stage, []).append(seconds)
+    median = statistics.median(timings)
+    return {
+        'rows': case['rows'],
+        'median': median,
+        'min': min(timings),
+        'max': max(timings),
+        'runs': len(timings),
+        'rows_per_second': case['rows'] / median if median > 0 else None,
+        'stages': {
+            stage: statistics.median(values)
+            for stage, values in stages.items()},
+        'records': results[-1]['records']}
+
+def get_commit():
+    """Get the current commit of the repository if it is available."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(report, baseline, tolerance):
+    """Get the list of cases that became slower than in the baseline."""
+    regressions = []
+    for name, result in report['cases'].items():
+        before = baseline['cases'].get(name, {})
+        if 'median' in result and 'median' in before:
+            limit = before['median'] * (1 + tolerance)
+            if result['median'] > limit:
+                regressions.append(
+                    f'{name}: {result["median"]:.4f}s '\
+                    f'> {before["median"]:.4f}s')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000])
+    parser.add_argument('--mode', action='append', choices=modes)
+    parser.add_argument('--skew', type=float, default=1.0)
+    parser.add_argument('--duplicates', type=float, default=0.05)
+    parser.add_argument('--change', type=float, default=0.1)
+    parser.add_argument('--width', type=int, default=20)
+    parser.add_argument('--columns', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sync', action='store_true')
+    parser.add_argument('--url')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case is not None:
+        run_case(json.loads(args.case))
+        return
+
+    parameters = {
+        'skew': args.skew, 'duplicates': args.duplicates,
+        'change': args.change, 'width': args.width,
+        'columns': args.columns, 'seed': args.seed,
+        'async': args.sync is False}
+    engine = 'sqlite' if args.url is None else args.url.split(':')[0]
+    report = {
+        'benchmark': 'loads',
+        'commit': get_commit(),
+        'python': sys.version.split()[0],
+        'engine': engine,
+        'timestamp': datetime.datetime.now().isoformat(),
+        'parameters': parameters,
+        'cases': {}}
+    for mode in args.mode or modes:
+        for rows in args.rows:
+            case = {**parameters, 'mode': mode, 'rows': rows, 'url': args.url}
+            report['cases'][f'{mode}_{rows}'] = measure(case, args.repeat)
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    print(text)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
+    pass
+
+if __name__ == '__main__':
+    main()
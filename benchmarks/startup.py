@@ -0,0 +1,132 @@
+"""
+Benchmark of the package import time and the startup of the main objects.
+Every case is measured in a fresh interpreter.
+
+Run from the repository root:
+
+    python benchmarks/startup.py --repeat 20 --output startup.json
+    python benchmarks/startup.py --baseline startup.json --tolerance 0.25
+
+With the baseline the script exits with the code 1 when the median time of
+any case is worse than the baseline more than the tolerance allows.
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import statistics
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Case name and the pair of setup code and measured code.
+cases = {
+    'import': (
+        '',
+        'import pypyrus_etl'),
+    'import_database': (
+        'import pypyrus_etl as etl',
+        'etl.Database'),
+    'import_pipeline': (
+        'import pypyrus_etl as etl',
+        'etl.Pipeline'),
+    'database': (
+        'import pypyrus_etl as etl; Database = etl.Database',
+        'Database(\'bench\', credentials=\'sqlite://\')'),
+    'host': (
+        'import pypyrus_etl as etl; Host = etl.Host',
+        'Host(\'bench\', ip=\'localhost\', port=22)')}
+
+template = '\n'.join([
+    'import time',
+    '{setup}',
+    'start = time.perf_counter()',
+    '{code}',
+    'print(time.perf_counter() - start)'])
+
+def measure(setup, code, repeat):
+    """Run the code in fresh interpreters and collect the timings."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root, *filter(None, [env.get('PYTHONPATH')])])
+    script = template.format(setup=setup, code=code)
+
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=root, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1:]
+            return {'error': ''.join(error)}
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'runs': len(timings)}
+
+def get_commit():
+    """Get the current commit of the repository if it is available."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(report, baseline, tolerance):
+    """Get the list of cases that became slower than in the baseline."""
+    regressions = []
+    for name, result in report['cases'].items():
+        before = baseline['cases'].get(name, {})
+        if 'median' in result and 'median' in before:
+            limit = before['median'] * (1 + tolerance)
+            if result['median'] > limit:
+                regressions.append(
+                    f'{name}: {result["median"]:.4f}s '\
+                    f'> {before["median"]:.4f}s')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--case', action='append', choices=sorted(cases))
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'startup',
+        'commit': get_commit(),
+        'python': sys.version.split()[0],
+        'timestamp': datetime.datetime.now().isoformat(),
+        'cases': {}}
+    for name in args.case or cases:
+        setup, code = cases[name]
+        report['cases'][name] = measure(setup, code, args.repeat)
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    print(text)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
+    pass
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,4 @@
-from .procs import Extractor, Transformer, Loader
-
-from .nodes.link import Link
-from .nodes.host import Host
-from .nodes.database import Database
-
-from .objects.table import Table
-
-from .pipelines import Pipeline
-
-from .nodes import link
-from .nodes import host
-from .nodes import database
-
-from .objects import table
+import importlib
 
 __author__ = 'Timur Faradzhov'
 __copyright__ = 'Copyright 2019, The Pypyrus ETL Project'
@@ -25,3 +11,34 @@ __email__ = 'timurfaradzhov@gmail.com'
 __status__ = 'Production'
 
 __doc__ = 'Python ETL application.'
+
+# Package attributes are imported on the first access so the import of the
+# package itself does not load SQLAlchemy, Paramiko and the pipelines.
+attributes = {
+    'Extractor': ('.procs', 'Extractor'),
+    'Transformer': ('.procs', 'Transformer'),
+    'Loader': ('.procs', 'Loader'),
+    'Link': ('.nodes.link', 'Link'),
+    'Host': ('.nodes.host', 'Host'),
+    'Database': ('.nodes.database', 'Database'),
+    'Table': ('.objects.table', 'Table'),
+    'File': ('.objects.file', 'File'),
+    'Pipeline': ('.pipelines', 'Pipeline'),
+    'Pipelines': ('.pipelines', 'Pipelines'),
+    'link': ('.nodes.link', None),
+    'host': ('.nodes.host', None),
+    'database': ('.nodes.database', None),
+    'table': ('.objects.table', None),
+    'file': ('.objects.file', None)}
+
+def __getattr__(name):
+    if name in attributes:
+        path, attribute = attributes[name]
+        module = importlib.import_module(path, __name__)
+        value = module if attribute is None else getattr(module, attribute)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted([*globals(), *attributes])
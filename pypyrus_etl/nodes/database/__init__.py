@@ -1,16 +1,22 @@
 import json
+import threading
 import configparser
 import sqlalchemy as sql
-import sqlalchemy.orm as orm
 
+from .ddl import alter
 from .dml import merge
-from .func import trim
+from .func import trim, sysdate, row_hash
 from .convs import naming_convention
+from .engines import get_engine
+from .bulk import encode_rows
+from .profiler import get_profiler
 
 class Database():
     def __init__(
         self, name, config=None, vendor=None, credentials=None,
-        host=None, port=None, sid=None, user=None, password=None
+        host=None, port=None, sid=None, user=None, password=None,
+        pool_size=None, max_overflow=None, pool_recycle=None,
+        pool_pre_ping=None
     ):
         if config is not None and credentials is None:
             config = self.parse_config(config)
@@ -21,14 +27,29 @@ class Database():
             sid = config[section].get('SID')
             user = config[section].get('User')
             password = config[section].get('Password')
+            # Connection pool parameters.
+            pool_size = config[section].getint('PoolSize', pool_size)
+            max_overflow = config[section].getint(
+                'MaxOverflow', max_overflow)
+            pool_recycle = config[section].getint(
+                'PoolRecycle', pool_recycle)
+            pool_pre_ping = config[section].getboolean(
+                'PrePing', pool_pre_ping)
 
         if credentials is None:
             credentials = f'{vendor}://{user}:{password}@{host}:{port}/{sid}'
-        self.engine = sql.create_engine(credentials)
-        self.session = orm.sessionmaker(bind=self.engine)()
+        else:
+            url = sql.engine.url.make_url(credentials)
+            vendor = vendor or url.get_backend_name()
+            user = user or url.username or ''
+
+        self.engine = get_engine(
+            credentials, pool_size=pool_size, max_overflow=max_overflow,
+            pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping)
         self.metadata = sql.MetaData(naming_convention=naming_convention)
-        self.connection = self.engine.connect()
-
+        # Each thread checks out its own connection when it needs one.
+        self.local = threading.local()
+        self._session = None
 
         self.name = name.lower()
         self.vendor = vendor.lower()
@@ -40,6 +61,93 @@ class Database():
                 'literal_binds': True}}
         pass
 
+    @property
+    def session(self):
+        """Get the ORM session created on the first use."""
+        if self._session is None:
+            import sqlalchemy.orm as orm
+            self._session = orm.sessionmaker(bind=self.engine)()
+        return self._session
+
+    @property
+    def connection(self):
+        """Get the connection checked out by the current thread."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self.engine.connect()
+        return connection
+
+    def pin(self):
+        """
+        Keep the connection of the current thread until unpin() so the state
+        of its session survives release().
+        """
+        self.local.pinned = True
+        pass
+
+    def unpin(self):
+        """Let the connection of the current thread be released again."""
+        self.local.pinned = False
+        pass
+
+    def is_pinned(self):
+        """Check if the connection of the current thread is pinned."""
+        return getattr(self.local, 'pinned', False)
+
+    def release(self):
+        """Return the connection of the current thread to the pool."""
+        if self.is_pinned() is True:
+            return
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            self.local.connection = None
+            connection.close()
+        pass
+
+    def profile(self, path, plans=False, threshold=0.0):
+        """
+        Record the statements executed in the database to the profile store
+        at the given path. Plans are taken when requested and statements
+        faster than the threshold in seconds are skipped.
+        """
+        profiler = get_profiler(path, plans=plans, threshold=threshold)
+        profiler.attach(self.engine)
+        return profiler
+
+    def bulk_insert(self, table, rows):
+        """
+        Insert the chunk of rows to the table using the fastest way the
+        database provides. Rows are the dictionaries with column names as
+        keys.
+        """
+        if len(rows) > 0:
+            if self.vendor == 'postgresql':
+                self.copy(table, rows)
+            else:
+                self.connection.execute(table.insert(), rows)
+        return len(rows)
+
+    def copy(self, table, rows):
+        """Load the chunk of rows to the table using PostgreSQL COPY."""
+        preparer = self.engine.dialect.identifier_preparer
+        columns = [column.name for column in table.columns]
+        if len(rows) > 0:
+            columns = [column for column in columns if column in rows[0]]
+
+        name = preparer.format_table(table)
+        fields = ', '.join(preparer.quote(column) for column in columns)
+        code = f'COPY {name} ({fields}) FROM STDIN'
+        buffer = encode_rows(rows, columns)
+
+        connection = self.connection
+        with connection.begin():
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(code, buffer)
+            finally:
+                cursor.close()
+        pass
+
     def parse_config(self, path):
         config = configparser.ConfigParser(allow_no_value=True)
         config.read(path)
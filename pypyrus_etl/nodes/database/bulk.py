@@ -0,0 +1,35 @@
+import io
+import datetime
+
+# Characters escaped in the text format of PostgreSQL COPY.
+escapes = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r'})
+
+def encode_value(value):
+    """Encode the value to the text format of PostgreSQL COPY."""
+    if value is None:
+        return '\\N'
+    elif isinstance(value, bool) is True:
+        return 't' if value is True else 'f'
+    elif isinstance(value, (datetime.datetime, datetime.date)) is True:
+        return value.isoformat()
+    elif isinstance(value, (bytes, bytearray, memoryview)) is True:
+        return '\\\\x' + bytes(value).hex()
+    else:
+        return str(value).translate(escapes)
+
+def encode_rows(rows, columns):
+    """
+    Encode rows to the buffer in the text format of PostgreSQL COPY.
+    Rows are the dictionaries with column names as keys.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        values = [encode_value(row.get(column)) for column in columns]
+        buffer.write('\t'.join(values))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
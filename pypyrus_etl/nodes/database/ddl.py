@@ -1,4 +1,5 @@
-from sqlalchemy.schema import DDLElement
+from sqlalchemy.schema import DDLElement, CreateTable
+from sqlalchemy.ext.compiler import compiles
 
 class alter(DDLElement):
     def __init__(self, object, action, *args, **kwargs):
@@ -7,3 +8,12 @@ class alter(DDLElement):
         self.args = args
         self.kwargs = kwargs
         pass
+
+@compiles(CreateTable, 'oracle')
+def compile_create_table(element, compiler, **kwargs):
+    """Add the partition clause kept in the table info."""
+    text = compiler.visit_create_table(element, **kwargs)
+    partition = element.element.info.get('oracle_partition_by')
+    if partition is not None:
+        text = f'{text.rstrip()}\nPARTITION BY {partition}\n\n'
+    return text
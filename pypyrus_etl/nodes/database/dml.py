@@ -1,60 +1,40 @@
+from sqlalchemy.exc import CompileError
 from sqlalchemy.sql.schema import Table
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.expression import Executable, ClauseElement, FunctionElement
+from sqlalchemy.sql.expression import Label, BindParameter, ColumnClause
 
 # CLASSES FOR COMPILATIONS.
 
 class merge(Executable, ClauseElement):
-    def __init__(self, table, using, keys, updcols, inscols, prefixes=None):
+    # Statement is committed at once as the core DML statements.
+    _execution_options = Executable._execution_options.union(
+        {'autocommit': True})
+
+    def __init__(
+        self, table, using, keys, updcols, inscols, prefixes=None,
+        compare=None, order=None
+    ):
         self.table = table
+        self.order = order
 
         if isinstance(using, Table) is True:
             using = using.select()
         self.using = using
 
         self._keys = keys
-        keys = []
-        for key in self._keys:
-            if isinstance(key, str) is True:
-                key = key.lower()
-                keys.append(f't.{key} = u.{key}')
-            elif isinstance(key, list) is True:
-                if len(key) == 2:
-                    table_key = key[0].lower()
-                    using_key = key[1].lower()
-                    keys.append(f't.{table_key} = u.{using_key}')
-        self.keys = keys
+        self.key_pairs = parse_pairs(keys)
+        self.keys = [f't.{left} = u.{right}' for left, right in self.key_pairs]
 
         self.updcols = updcols
-        updates = []
-        for column in updcols:
-            if isinstance(column, str) is True:
-                column = column.lower()
-                updates.append(f't.{column} = u.{column}')
-            elif isinstance(column, list) is True:
-                if len(column) == 2:
-                    table_column = column[0].lower()
-                    using_column = column[1].lower()
-                    updates.append(
-                        f't.{table_column} = u.{using_column}')
-        self.updates = updates
+        self.update_pairs = parse_pairs(updcols)
+        self.updates = [
+            f't.{left} = u.{right}' for left, right in self.update_pairs]
 
         self.inscols = inscols
-        values = []
-        inserts = []
-        for column in inscols:
-            if isinstance(column, str) is True:
-                column = column.lower()
-                values.append(f't.{column}')
-                inserts.append(f'u.{column}')
-            elif isinstance(column, list) is True:
-                if len(column) == 2:
-                    values_column = column[0].lower()
-                    insert_column = column[1].lower()
-                    values.append(f't.{values_column}')
-                    inserts.append(f'u.{insert_column}')
-        self.values = values
-        self.inserts = inserts
+        self.insert_pairs = parse_pairs(inscols)
+        self.values = [f't.{left}' for left, right in self.insert_pairs]
+        self.inserts = [f'u.{right}' for left, right in self.insert_pairs]
 
         if prefixes is None:
             self.prefixes = [' ']
@@ -63,12 +43,17 @@ class merge(Executable, ClauseElement):
         elif isinstance(prefixes, str) is True:
             self.prefixes = [f' {prefixes} ']
 
+        self._compare = compare
+        self.compare = parse_compare(compare)
+
         stmt = [
             'MERGE{prefixes}INTO {table} t',
             'USING ({using}) u',
             'ON ({keys})',
             'WHEN MATCHED THEN UPDATE SET {updates}',
             'WHEN NOT MATCHED THEN INSERT ({values}) VALUES ({inserts})']
+        if self.compare is not None:
+            stmt.insert(4, 'WHERE {compare}')
         self.stmt = '\n'.join(stmt)
         pass
 
@@ -78,6 +63,8 @@ class merge(Executable, ClauseElement):
         keys = self._keys
         updcols = self.updcols
         inscols = self.inscols
+        compare = self._compare
+        order = self.order
 
         allow = True
         if self.bind is not None and dialect is not None:
@@ -86,44 +73,35 @@ class merge(Executable, ClauseElement):
 
         if allow is True:
             return merge(
-                table, using, keys, updcols, inscols, prefixes=prefixes)
+                table, using, keys, updcols, inscols, prefixes=prefixes,
+                compare=compare, order=order)
         else:
             return self
 
 class update(Executable, ClauseElement):
-    def __init__(self, table, using, keys, columns, prefixes=None):
+    # Statement is committed at once as the core DML statements.
+    _execution_options = Executable._execution_options.union(
+        {'autocommit': True})
+
+    def __init__(
+        self, table, using, keys, columns, prefixes=None, compare=None,
+        order=None
+    ):
         self.table = table
+        self.order = order
 
         if isinstance(using, Table) is True:
             using = using.select()
         self.using = using
 
         self._keys = keys
-        keys = []
-        for key in self._keys:
-            if isinstance(key, str) is True:
-                key = key.lower()
-                keys.append(f't.{key} = u.{key}')
-            elif isinstance(key, list) is True:
-                if len(key) == 2:
-                    table_key = key[0].lower()
-                    using_key = key[1].lower()
-                    keys.append(f't.{table_key} = u.{using_key}')
-        self.keys = keys
+        self.key_pairs = parse_pairs(keys)
+        self.keys = [f't.{left} = u.{right}' for left, right in self.key_pairs]
 
         self._columns = columns
-        columns = []
-        for column in self._columns:
-            if isinstance(column, str) is True:
-                column = column.lower()
-                columns.append(f't.{column} = u.{column}')
-            elif isinstance(column, list) is True:
-                if len(column) == 2:
-                    table_column = column[0].lower()
-                    using_column = column[1].lower()
-                    columns.append(
-                        f't.{table_column} = u.{using_column}')
-        self.columns = columns
+        self.column_pairs = parse_pairs(columns)
+        self.columns = [
+            f't.{left} = u.{right}' for left, right in self.column_pairs]
 
         if prefixes is None:
             self.prefixes = [' ']
@@ -132,11 +110,16 @@ class update(Executable, ClauseElement):
         elif isinstance(prefixes, str) is True:
             self.prefixes = [f' {prefixes} ']
 
+        self._compare = compare
+        self.compare = parse_compare(compare)
+
         merge_stmt = [
             'MERGE{prefixes}INTO {table} t',
             'USING ({using}) u',
             'ON ({keys})',
             'WHEN MATCHED THEN UPDATE SET {columns}']
+        if self.compare is not None:
+            merge_stmt.append('WHERE {compare}')
         self.merge_stmt = '\n'.join(merge_stmt)
         pass
 
@@ -145,6 +128,8 @@ class update(Executable, ClauseElement):
         using = self.using
         keys = self._keys
         columns = self._columns
+        compare = self._compare
+        order = self.order
 
         allow = True
         if self.bind is not None and dialect is not None:
@@ -152,43 +137,211 @@ class update(Executable, ClauseElement):
                 allow = False
 
         if allow is True:
-            return update(table, using, keys, columns, prefixes=prefixes)
+            return update(
+                table, using, keys, columns, prefixes=prefixes,
+                compare=compare, order=order)
         else:
             return self
 
 class trim(FunctionElement):
     name = 'trim'
 
+def parse_pairs(columns):
+    """Get the pairs of the table and the using column names."""
+    pairs = []
+    for column in columns:
+        if isinstance(column, str) is True:
+            column = column.lower()
+            pairs.append((column, column))
+        elif isinstance(column, list) is True:
+            if len(column) == 2:
+                pairs.append((column[0].lower(), column[1].lower()))
+    return pairs
+
+def parse_compare(compare, table='t.{}', using='u.{}'):
+    """
+    Get the condition allowing the update of the matched row only when any
+    of the compared columns differs.
+    """
+    if compare is not None and len(compare) > 0:
+        conditions = []
+        for column in compare:
+            column = column.lower()
+            left = table.format(column)
+            right = using.format(column)
+            conditions.append(f'({left} <> {right} OR {left} IS NULL)')
+        return ' OR '.join(conditions)
+
+def get_upsert_value(element, column, template, compiler, **kwargs):
+    """
+    Get the value of the updated column in the upsert. Inserted columns are
+    taken from the proposed row. Other columns can be only the constants of
+    the using query.
+    """
+    for left, right in element.insert_pairs:
+        if right == column:
+            return template.format(left)
+    using = element.using
+    for expression in getattr(using, 'inner_columns', []):
+        if getattr(expression, 'name', None) != column:
+            continue
+        if isinstance(expression, Label) is True:
+            expression = expression.element
+        if isinstance(expression, BindParameter) is True \
+        or isinstance(expression, ColumnClause) is True \
+        and expression.table is None:
+            return compiler.process(expression, **kwargs)
+    raise CompileError(
+        f'Updated column <{column}> must be inserted or constant.')
+
+def compile_using(element, compiler, **kwargs):
+    """
+    Get the using query with one row per key so the matched row is changed
+    once in all databases. The last row of the key in the order is taken.
+    """
+    using = compiler.process(element.using, **kwargs)
+    keys = ', '.join(f'u.{right}' for left, right in element.key_pairs)
+    if element.order is not None and len(element.order) > 0:
+        order = ', '.join(f'u.{name.lower()} DESC' for name in element.order)
+    else:
+        order = keys
+    stmt = [
+        'SELECT * FROM (',
+        'SELECT u.*, ROW_NUMBER() OVER '\
+            f'(PARTITION BY {keys} ORDER BY {order}) AS etl_row_number',
+        f'FROM ({using}) u) u',
+        'WHERE etl_row_number = 1']
+    return '\n'.join(stmt)
+
 # COMPILATIONS
 
 @compiles(merge)
 def compile(element, compiler, **kwargs):
-    pass
+    dialect = compiler.dialect.name
+    raise CompileError(f'Merge is not supported by <{dialect}>.')
 
-@compiles(merge, 'oracle', 'postgresql')
+@compiles(merge, 'oracle')
 def compile(element, compiler, **kwargs):
     kwargs['literal_binds'] = True
     return element.stmt.format(
         table=compiler.process(element.table, asfrom=True, **kwargs),
-        using=compiler.process(element.using, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
         keys='\nAND '.join(element.keys),
         updates=', '.join(element.updates),
         values=', '.join(element.values),
         inserts=', '.join(element.inserts),
+        compare=element.compare,
+        prefixes=' '.join(element.prefixes))
+
+@compiles(merge, 'postgresql', 'sqlite')
+def compile(element, compiler, **kwargs):
+    kwargs['literal_binds'] = True
+    stmt = [
+        'INSERT{prefixes}INTO {table} AS t ({values})',
+        'SELECT {inserts}',
+        'FROM ({using}) u',
+        # Condition separates the select from the conflict clause in SQLite.
+        'WHERE 1 = 1',
+        'ON CONFLICT ({keys})',
+        'DO UPDATE SET {updates}']
+    compare = parse_compare(element._compare, using='excluded.{}')
+    if compare is not None:
+        stmt.append('WHERE {compare}')
+    updates = []
+    for left, right in element.update_pairs:
+        value = get_upsert_value(
+            element, right, 'excluded.{}', compiler, **kwargs)
+        updates.append(f'{left} = {value}')
+    return '\n'.join(stmt).format(
+        table=compiler.process(element.table, asfrom=True, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
+        keys=', '.join(left for left, right in element.key_pairs),
+        updates=', '.join(updates),
+        values=', '.join(left for left, right in element.insert_pairs),
+        inserts=', '.join(element.inserts),
+        compare=compare,
+        prefixes=' '.join(element.prefixes))
+
+@compiles(merge, 'mysql')
+def compile(element, compiler, **kwargs):
+    kwargs['literal_binds'] = True
+    stmt = [
+        'INSERT{prefixes}INTO {table} ({values})',
+        'SELECT {inserts}',
+        'FROM ({using}) u',
+        'ON DUPLICATE KEY UPDATE {updates}']
+    compare = parse_compare(element._compare, table='{}', using='VALUES({})')
+    # Assignments see the values changed before so compared columns are
+    # changed the last.
+    pairs = sorted(
+        element.update_pairs,
+        key=lambda pair: pair[0] in (element._compare or []))
+    updates = []
+    for left, right in pairs:
+        value = get_upsert_value(
+            element, right, 'VALUES({})', compiler, **kwargs)
+        if compare is not None:
+            value = f'IF({compare}, {value}, {left})'
+        updates.append(f'{left} = {value}')
+    return '\n'.join(stmt).format(
+        table=compiler.process(element.table, asfrom=True, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
+        updates=', '.join(updates),
+        values=', '.join(left for left, right in element.insert_pairs),
+        inserts=', '.join(element.inserts),
         prefixes=' '.join(element.prefixes))
 
 @compiles(update)
 def compile(element, compiler, **kwargs):
-    pass
+    dialect = compiler.dialect.name
+    raise CompileError(f'Update is not supported by <{dialect}>.')
+
+@compiles(update, 'postgresql', 'sqlite')
+def compile(element, compiler, **kwargs):
+    kwargs['literal_binds'] = True
+    stmt = [
+        'UPDATE{prefixes}{table} AS t',
+        'SET {columns}',
+        'FROM ({using}) u',
+        'WHERE {keys}']
+    if element.compare is not None:
+        stmt.append('AND ({compare})')
+    columns = [f'{left} = u.{right}' for left, right in element.column_pairs]
+    return '\n'.join(stmt).format(
+        table=compiler.process(element.table, asfrom=True, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
+        keys='\nAND '.join(element.keys),
+        columns=', '.join(columns),
+        compare=element.compare,
+        prefixes=' '.join(element.prefixes))
+
+@compiles(update, 'mysql')
+def compile(element, compiler, **kwargs):
+    kwargs['literal_binds'] = True
+    stmt = [
+        'UPDATE{prefixes}{table} t',
+        'JOIN ({using}) u',
+        'ON {keys}',
+        'SET {columns}']
+    if element.compare is not None:
+        stmt.append('WHERE {compare}')
+    return '\n'.join(stmt).format(
+        table=compiler.process(element.table, asfrom=True, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
+        keys='\nAND '.join(element.keys),
+        columns=', '.join(element.columns),
+        compare=element.compare,
+        prefixes=' '.join(element.prefixes))
 
-@compiles(update, 'oracle', 'postgresql')
+@compiles(update, 'oracle')
 def compile(element, compiler, **kwargs):
     kwargs['literal_binds'] = True
     return element.merge_stmt.format(
         table=compiler.process(element.table, asfrom=True, **kwargs),
-        using=compiler.process(element.using, **kwargs),
+        using=compile_using(element, compiler, **kwargs),
         keys='\nAND '.join(element.keys),
         columns=', '.join(element.columns),
+        compare=element.compare,
         prefixes=' '.join(element.prefixes))
 
 def parallel(stmt, dop='auto'):
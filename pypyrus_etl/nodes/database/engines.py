@@ -0,0 +1,27 @@
+import threading
+import sqlalchemy as sql
+
+# Engines shared by all database objects of the process.
+engines = {}
+lock = threading.Lock()
+
+def get_engine(credentials, **options):
+    """
+    Get the engine for the credentials and pool options. Database objects
+    with the same credentials share one engine and its connection pool.
+    """
+    options = {
+        key: value for key, value in options.items() if value is not None}
+    key = (credentials, tuple(sorted(options.items())))
+    with lock:
+        if key not in engines:
+            engines[key] = sql.create_engine(credentials, **options)
+        return engines[key]
+
+def dispose_engines():
+    """Close all pooled connections and forget all engines."""
+    with lock:
+        for engine in engines.values():
+            engine.dispose()
+        engines.clear()
+    pass
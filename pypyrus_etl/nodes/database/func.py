@@ -1,3 +1,5 @@
+from sqlalchemy import types
+from sqlalchemy.exc import CompileError
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.expression import FunctionElement
 
@@ -11,3 +13,80 @@ def visit_trim(element, compiler, **kwargs):
         return 'TRIM(%s) AS %s' % (
             compiler.process(element.clauses, **kwargs),
             list(element.clauses)[0].name)
+
+class sysdate(FunctionElement):
+    """
+    Current date and time of the database. Oracle keeps its own SYSDATE
+    while the other databases use the standard CURRENT_TIMESTAMP.
+    """
+    name = 'sysdate'
+    type = types.DateTime()
+    pass
+
+@compiles(sysdate)
+def visit_sysdate(element, compiler, **kwargs):
+    return 'CURRENT_TIMESTAMP'
+
+@compiles(sysdate, 'oracle')
+def visit_sysdate(element, compiler, **kwargs):
+    return 'SYSDATE'
+
+class row_hash(FunctionElement):
+    """
+    Hash of the row calculated over the given columns. Hash is the string of
+    32 hexadecimal characters so it can be stored and compared the same way
+    in all databases.
+    """
+    name = 'row_hash'
+    pass
+
+@compiles(row_hash)
+def visit_row_hash(element, compiler, **kwargs):
+    raise CompileError(
+        f'Row hash is not supported by <{compiler.dialect.name}>.')
+
+@compiles(row_hash, 'oracle')
+def visit_row_hash(element, compiler, **kwargs):
+    # Values are converted with the explicit formats so the hash does not
+    # depend on the NLS settings of the session.
+    columns = []
+    for column in element.clauses:
+        value = compiler.process(column, **kwargs)
+        if isinstance(column.type, types.TIMESTAMP) is True:
+            value = f"TO_CHAR({value}, 'YYYY-MM-DD HH24:MI:SS.FF9')"
+        elif isinstance(column.type, (types.DateTime, types.Date)) is True:
+            value = f"TO_CHAR({value}, 'YYYY-MM-DD HH24:MI:SS')"
+        elif isinstance(column.type, (types.Numeric, types.Integer)) is True:
+            value = f"TO_CHAR({value}, 'TM9', "\
+                "'NLS_NUMERIC_CHARACTERS=''.,''')"
+        else:
+            value = f'TO_CHAR({value})'
+        columns.append(compile_hash_part(value, 'LENGTH', '||'))
+    columns = ' || '.join(columns)
+    return f"RAWTOHEX(STANDARD_HASH({columns}, 'MD5'))"
+
+@compiles(row_hash, 'postgresql')
+def visit_row_hash(element, compiler, **kwargs):
+    columns = compiler.process(element.clauses, **kwargs)
+    return f'MD5(ROW({columns})::TEXT)'
+
+@compiles(row_hash, 'mysql')
+def visit_row_hash(element, compiler, **kwargs):
+    columns = []
+    for column in element.clauses:
+        value = compiler.process(column, **kwargs)
+        value = f'CAST({value} AS CHAR)'
+        columns.append(compile_hash_part(value, 'CHAR_LENGTH', None))
+    columns = ', '.join(columns)
+    return f'MD5(CONCAT({columns}))'
+
+def compile_hash_part(value, length, concat):
+    """
+    Get the hashed part of the value prefixed by its length so the values
+    cannot be shifted between the columns. Null is marked separately.
+    """
+    if concat is None:
+        part = f"CONCAT({length}({value}), ':', {value})"
+    else:
+        part = f"{length}({value}) {concat} ':' {concat} {value}"
+    return f"COALESCE({part}, '-')"
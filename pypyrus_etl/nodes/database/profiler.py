@@ -0,0 +1,326 @@
+import os
+import re
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+import sqlalchemy as sql
+
+from datetime import datetime
+
+# Pipeline and stage of statements executed by the current thread.
+context = threading.local()
+
+# Profilers shared by all database objects of the process.
+profilers = {}
+lock = threading.Lock()
+
+def set_context(pipeline=None, stage=None):
+    """Set the pipeline and the stage of the current thread."""
+    context.pipeline = pipeline
+    context.stage = stage
+    pass
+
+def get_context():
+    """Get the pipeline and the stage of the current thread."""
+    pipeline = getattr(context, 'pipeline', None)
+    stage = getattr(context, 'stage', None)
+    return pipeline, stage
+
+def bind(function):
+    """
+    Wrap the function so it runs in the context of the current thread when
+    it is called by another one.
+    """
+    pipeline, stage = get_context()
+    def wrapper(*args, **kwargs):
+        set_context(pipeline, stage)
+        return function(*args, **kwargs)
+    return wrapper
+
+def normalize(statement):
+    """
+    Normalize the statement so the same statements with other literals and
+    other formatting are the same.
+    """
+    statement = re.sub(r"'(?:[^']|'')*'", '?', statement)
+    statement = re.sub(r'\b\d+(?:\.\d+)?\b', '?', statement)
+    statement = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?)', statement)
+    statement = re.sub(r'\s+', ' ', statement)
+    return statement.strip()
+
+def get_profiler(path, plans=False, threshold=0.0):
+    """
+    Get the profiler writing to the given store. Store is configured once
+    so the other parameters for the same store are an error.
+    """
+    path = os.path.abspath(path)
+    with lock:
+        if path not in profilers:
+            profilers[path] = Profiler(
+                path, plans=plans, threshold=threshold)
+        profiler = profilers[path]
+    if profiler.plans != plans or profiler.threshold != threshold:
+        raise ValueError(
+            f'Profile <{path}> is already used with plans '\
+            f'<{profiler.plans}> and threshold <{profiler.threshold}>.')
+    return profiler
+
+def flush():
+    """Write the recorded statements of all profilers."""
+    with lock:
+        items = list(profilers.values())
+    for profiler in items:
+        profiler.flush()
+    pass
+
+atexit.register(flush)
+
+class Profiler():
+    """
+    That class represents the profiler of SQL statements. Statements
+    executed by the attached engines are recorded with the pipeline, the
+    stage, the elapsed time and the rowcount to the local SQLite store.
+    Literals are removed from the recorded text so the store does not keep
+    the data and the same statements are grouped in reports.
+    """
+    def __init__(self, path, plans=False, threshold=0.0, size=100):
+        self.path = path
+        self.plans = plans
+        self.threshold = threshold
+        self.size = size
+
+        self.run_id = f'{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}'
+        self.engines = []
+        self.records = []
+        # Plans are taken once per statement in the run.
+        self.explained = set()
+        self.lock = threading.Lock()
+
+        self.prepare()
+        pass
+
+    def prepare(self):
+        """Create the store table if it does not exist."""
+        code = [
+            'CREATE TABLE IF NOT EXISTS statements (',
+            '  run_id TEXT,',
+            '  timestamp TEXT,',
+            '  pipeline TEXT,',
+            '  stage TEXT,',
+            '  database TEXT,',
+            '  fingerprint TEXT,',
+            '  statement TEXT,',
+            '  elapsed REAL,',
+            '  rowcount INTEGER,',
+            '  plan TEXT)']
+        code = '\n'.join(code)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute(code)
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS statements_fingerprint '\
+                'ON statements (fingerprint)')
+            connection.commit()
+        finally:
+            connection.close()
+        pass
+
+    def attach(self, engine):
+        """Start profiling the statements of the engine."""
+        with self.lock:
+            if engine in self.engines:
+                return
+            self.engines.append(engine)
+        sql.event.listen(engine, 'before_cursor_execute', self.before)
+        sql.event.listen(engine, 'after_cursor_execute', self.after)
+        pass
+
+    def detach(self, engine):
+        """Stop profiling the statements of the engine."""
+        with self.lock:
+            if engine not in self.engines:
+                return
+            self.engines.remove(engine)
+        sql.event.remove(engine, 'before_cursor_execute', self.before)
+        sql.event.remove(engine, 'after_cursor_execute', self.after)
+        pass
+
+    def before(
+        self, connection, cursor, statement, parameters, context,
+        executemany
+    ):
+        """Remember the moment the statement started."""
+        starts = connection.info.setdefault('profiler_starts', [])
+        starts.append(time.perf_counter())
+        pass
+
+    def after(
+        self, connection, cursor, statement, parameters, context,
+        executemany
+    ):
+        """Record the executed statement."""
+        starts = connection.info.get('profiler_starts')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold:
+            return
+
+        pipeline, stage = get_context()
+        database = connection.engine.url.database
+        text = normalize(statement)
+        fingerprint = hashlib.md5(text.encode()).hexdigest()[:16]
+        rowcount = cursor.rowcount if cursor.rowcount >= 0 else None
+
+        plan = None
+        if self.plans is True and executemany is False:
+            plan = self.explain(
+                connection, statement, parameters, fingerprint)
+
+        timestamp = datetime.now().isoformat()
+        record = (
+            self.run_id, timestamp, pipeline, stage, database, fingerprint,
+            text, elapsed, rowcount, plan)
+        with self.lock:
+            self.records.append(record)
+            full = len(self.records) >= self.size
+        if full is True:
+            self.flush()
+        pass
+
+    def explain(self, connection, statement, parameters, fingerprint):
+        """
+        Get the execution plan of the statement. Only queries and DML are
+        explained and any failure to get the plan is ignored.
+        """
+        with self.lock:
+            if fingerprint in self.explained:
+                return None
+            self.explained.add(fingerprint)
+
+        words = statement.split(None, 1)
+        keyword = words[0].upper() if len(words) > 0 else None
+        keywords = ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'WITH']
+        if keyword not in keywords:
+            return None
+
+        vendor = connection.dialect.name
+        explainer = connection.connection.cursor()
+        # Failed statement aborts the whole transaction in PostgreSQL.
+        savepoint = vendor == 'postgresql'
+        try:
+            if savepoint is True:
+                explainer.execute('SAVEPOINT etl_explain')
+            if vendor == 'oracle':
+                explainer.execute(
+                    f"EXPLAIN PLAN SET STATEMENT_ID = '{fingerprint}' "\
+                    f"FOR {statement}", parameters)
+                explainer.execute(
+                    'SELECT plan_table_output '\
+                    'FROM TABLE(DBMS_XPLAN.DISPLAY(NULL, :id))',
+                    {'id': fingerprint})
+            elif vendor == 'sqlite':
+                explainer.execute(
+                    f'EXPLAIN QUERY PLAN {statement}', parameters)
+            else:
+                explainer.execute(f'EXPLAIN {statement}', parameters)
+            rows = explainer.fetchall()
+            if savepoint is True:
+                explainer.execute('RELEASE SAVEPOINT etl_explain')
+        except Exception:
+            if savepoint is True:
+                try:
+                    explainer.execute('ROLLBACK TO SAVEPOINT etl_explain')
+                except Exception:
+                    pass
+            return None
+        finally:
+            explainer.close()
+        rows = [' '.join(str(value) for value in row) for row in rows]
+        return '\n'.join(rows)
+
+    def flush(self):
+        """Write the recorded statements to the store."""
+        with self.lock:
+            records = self.records
+            self.records = []
+        if len(records) == 0:
+            return
+
+        code = 'INSERT INTO statements VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.executemany(code, records)
+            connection.commit()
+        finally:
+            connection.close()
+        pass
+
+    def report(self, top=10, runs=None, pipeline=None):
+        """
+        Get the slowest statements by the total elapsed time across the
+        last runs or all runs stored in the profile.
+        """
+        self.flush()
+
+        filters = []
+        params = []
+        if runs is not None:
+            filters.append(
+                'run_id IN (SELECT DISTINCT run_id FROM statements '\
+                'ORDER BY run_id DESC LIMIT ?)')
+            params.append(runs)
+        if pipeline is not None:
+            filters.append('pipeline = ?')
+            params.append(pipeline)
+        where = f'WHERE {" AND ".join(filters)}' if len(filters) > 0 else ''
+
+        code = [
+            'SELECT fingerprint,',
+            '       MIN(statement) AS statement,',
+            '       GROUP_CONCAT(DISTINCT pipeline) AS pipelines,',
+            '       GROUP_CONCAT(DISTINCT stage) AS stages,',
+            '       COUNT(DISTINCT run_id) AS runs,',
+            '       COUNT(*) AS executions,',
+            '       SUM(elapsed) AS total,',
+            '       AVG(elapsed) AS average,',
+            '       MAX(elapsed) AS maximum,',
+            '       SUM(rowcount) AS rows,',
+            '       MAX(plan) AS plan',
+            '  FROM statements',
+            f' {where}',
+            ' GROUP BY fingerprint',
+            ' ORDER BY total DESC',
+            ' LIMIT ?']
+        code = '\n'.join(code)
+        params.append(top)
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(code, params).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
+
+    def describe(self, top=10, runs=None, pipeline=None):
+        """Get the report of the slowest statements as the text."""
+        lines = []
+        report = self.report(top=top, runs=runs, pipeline=pipeline)
+        for i, row in enumerate(report, start=1):
+            lines.append(
+                f'{i}. total {row["total"]:.3f}s, '\
+                f'average {row["average"]:.3f}s, '\
+                f'maximum {row["maximum"]:.3f}s, '\
+                f'executions {row["executions"]}, runs {row["runs"]}, '\
+                f'rows {row["rows"]}')
+            lines.append(f'   pipelines: {row["pipelines"]}')
+            lines.append(f'   stages: {row["stages"]}')
+            lines.append(f'   {row["statement"]}')
+            if row['plan'] is not None:
+                for line in row['plan'].splitlines():
+                    lines.append(f'   | {line}')
+            lines.append('')
+        return '\n'.join(lines)
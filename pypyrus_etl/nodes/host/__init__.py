@@ -1,38 +1,180 @@
-import paramiko
+import io
+import glob
+import stat
+import fnmatch
+import posixpath
+
+from .transfer import Transfer
 
 class Host():
-    """That class represents a host object."""
+    """
+    That class represents a host object. SSH and SFTP connections are opened
+    on the first use.
+    """
     def __init__(
         self, name, system=None, ip=None, port=None, user=None, password=None,
         key=None, config=None, ssh=True, sftp=True
     ):
         self.name = name
+        self.system = system
+        self.ip = ip
+        self.port = port
+        self.user = user
+        self.password = password
+        self.key = key
 
         if config is not None:
             pass
 
-        if ssh is True:
-            self.ssh = paramiko.SSHClient()
-            self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.ssh.connect(ip, port=port, username=user, password=password)
-        else:
-            self.ssh = None
-
-        if sftp is True:
-            if ssh is True:
-                self.sftp = self.ssh.open_sftp()
-            elif ssh is False:
-                transport = paramiko.Transport((ip, port))
-                transport.connect(username=user, password=password)
-                self.sftp = paramiko.SFTPClient.from_transport(transport)
-        else:
-            sftp = None
+        self.with_ssh = ssh
+        self.with_sftp = sftp
+        self._ssh = None
+        self._sftp = None
         pass
 
+    @property
+    def ssh(self):
+        """Get the SSH client connected on the first use."""
+        if self._ssh is None and self.with_ssh is True:
+            import paramiko
+
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect(
+                self.ip, port=self.port,
+                username=self.user, password=self.password)
+            self._ssh = ssh
+        return self._ssh
+
+    @property
+    def sftp(self):
+        """Get the SFTP client connected on the first use."""
+        if self._sftp is None and self.with_sftp is True:
+            import paramiko
+
+            if self.with_ssh is True:
+                self._sftp = self.ssh.open_sftp()
+            else:
+                transport = paramiko.Transport((self.ip, self.port))
+                transport.connect(username=self.user, password=self.password)
+                self._sftp = paramiko.SFTPClient.from_transport(transport)
+        return self._sftp
+
+    def connect(self):
+        """Open the new transport to the host."""
+        import paramiko
+
+        transport = paramiko.Transport((self.ip, self.port or 22))
+        transport.connect(username=self.user, password=self.password)
+        return transport
+
+    def get_many(
+        self, paths, folder, workers=4, transports=1, part=8388608,
+        block=32768, journal=None
+    ):
+        """
+        Download the remote files to the local folder. Paths may be the list
+        or the pattern. Files are transferred by several parallel channels and
+        big files are split into parts of the given size downloaded in
+        parallel as well. Interrupted transfer is resumed on the next call
+        from the parts recorded in the journal.
+        """
+        if isinstance(paths, str) is True:
+            paths = self.find(paths)
+        with Transfer(
+            self, workers=workers, transports=transports, part=part,
+            block=block, journal=journal
+        ) as transfer:
+            return transfer.get(paths, folder)
+
+    def put_many(
+        self, paths, folder, workers=4, transports=1, part=8388608,
+        block=32768, journal=None
+    ):
+        """
+        Upload the local files to the remote folder. Paths may be the list
+        or the pattern. Transfer works the same way as in get_many().
+        """
+        if isinstance(paths, str) is True:
+            paths = sorted(glob.glob(paths))
+        with Transfer(
+            self, workers=workers, transports=transports, part=part,
+            block=block, journal=journal
+        ) as transfer:
+            return transfer.put(paths, folder)
+
     def move(self, src, dest):
-        if self.sftp is not None:
+        if self.with_sftp is True:
             self.sftp.rename(src, dest)
-        elif ssh is not None:
+        elif self.with_ssh is True:
             command = f'mv {src} {dest}'
             stdin, stdout, stderr = self.ssh.exec_command(command)
         pass
+
+    def find(self, pattern):
+        """Get the sorted paths of remote files matching the pattern."""
+        folder, mask = posixpath.split(pattern)
+        paths = []
+        for item in self.sftp.listdir_attr(folder or '.'):
+            if stat.S_ISREG(item.st_mode) is True:
+                if fnmatch.fnmatch(item.filename, mask) is True:
+                    paths.append(posixpath.join(folder, item.filename))
+        return sorted(paths)
+
+    def read(self, path, block=32768, window=64):
+        """
+        Read the remote file by blocks. All blocks of the window are requested
+        at once so the network latency does not limit the speed while the
+        memory is bounded by the window size.
+        """
+        with self.sftp.open(path, 'rb') as file:
+            size = file.stat().st_size
+            offset = 0
+            while offset < size:
+                ranges = []
+                while offset < size and len(ranges) < window:
+                    length = min(block, size - offset)
+                    ranges.append((offset, length))
+                    offset += length
+                for data in file.readv(ranges):
+                    yield data
+
+    def open(self, path, encoding=None, block=32768, window=64):
+        """
+        Open the remote file as the stream readable without downloading the
+        whole file. Text stream is returned when the encoding is given.
+        """
+        blocks = self.read(path, block=block, window=window)
+        stream = io.BufferedReader(Stream(blocks), buffer_size=block*window)
+        if encoding is not None:
+            stream = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        return stream
+
+class Stream(io.RawIOBase):
+    """That class represents the readable stream over blocks of bytes."""
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.rest = memoryview(b'')
+        pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.rest) == 0:
+            try:
+                self.rest = memoryview(next(self.blocks))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.rest))
+        buffer[:size] = self.rest[:size]
+        self.rest = self.rest[size:]
+        return size
+
+    def close(self):
+        if self.closed is False:
+            close = getattr(self.blocks, 'close', None)
+            if close is not None:
+                close()
+        super().close()
+        pass
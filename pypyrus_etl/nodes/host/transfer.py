@@ -0,0 +1,330 @@
+import os
+import json
+import queue
+import threading
+import posixpath
+
+from concurrent import futures
+
+class Journal():
+    """
+    That class represents the journal of one transferred file. Every range
+    is recorded only after it is written and flushed so the interrupted
+    transfer resumes from the verified ranges.
+    """
+    def __init__(self, path, source, size, mtime, part):
+        self.path = path
+        self.header = {
+            'source': source, 'size': size, 'mtime': mtime, 'part': part}
+        self.done = set()
+        self.lock = threading.Lock()
+        self.load()
+        pass
+
+    def load(self):
+        """Read the verified ranges if journal belongs to the same file."""
+        if os.path.exists(self.path) is True:
+            with open(self.path, 'r') as file:
+                lines = file.read().splitlines()
+            try:
+                header = json.loads(lines[0]) if len(lines) > 0 else None
+            except ValueError:
+                header = None
+            if header == self.header:
+                for line in lines[1:]:
+                    # Last line may be cut by the interruption.
+                    try:
+                        self.done.add(json.loads(line))
+                    except ValueError:
+                        break
+                return
+        self.reset()
+        pass
+
+    def reset(self):
+        """Start the journal from scratch."""
+        with open(self.path, 'w') as file:
+            file.write(json.dumps(self.header) + '\n')
+        self.done.clear()
+        pass
+
+    def save(self, offset):
+        """Record the verified range."""
+        with self.lock:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(offset) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self.done.add(offset)
+        pass
+
+    def remove(self):
+        """Delete the journal of the completed transfer."""
+        if os.path.exists(self.path) is True:
+            os.remove(self.path)
+        pass
+
+class Transfer():
+    """
+    That class represents the bulk transfer of files between the local
+    machine and the remote host. Files are split into ranges transferred in
+    parallel by SFTP channels opened over one or more transports. Ranges are
+    written at their offsets to the temporary part file which replaces the
+    final one when all ranges are done.
+    """
+    def __init__(
+        self, host, workers=4, transports=1, part=8388608, block=32768,
+        journal=None
+    ):
+        self.host = host
+        self.workers = workers
+        self.transports = transports
+        self.part = part
+        self.block = block
+        self.journal = journal
+
+        self.connections = []
+        self.clients = queue.Queue()
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        pass
+
+    def open(self):
+        """Open the transports and one SFTP channel for every worker."""
+        import paramiko
+
+        for i in range(max(1, self.transports)):
+            self.connections.append(self.host.connect())
+        for i in range(max(1, self.workers)):
+            transport = self.connections[i % len(self.connections)]
+            client = paramiko.SFTPClient.from_transport(transport)
+            self.clients.put(client)
+        pass
+
+    def close(self):
+        """Close all channels and transports."""
+        while self.clients.empty() is False:
+            self.clients.get().close()
+        for transport in self.connections:
+            transport.close()
+        self.connections.clear()
+        pass
+
+    def get_journal(self, path):
+        """Get the journal path for the local file."""
+        folder = self.journal or os.path.dirname(path)
+        return os.path.join(folder, f'{os.path.basename(path)}.journal')
+
+    def get_ranges(self, size, journal):
+        """Get the offsets and lengths of ranges not transferred yet."""
+        for offset in range(0, size, self.part):
+            if offset not in journal.done:
+                yield offset, min(self.part, size - offset)
+
+    def is_same(self, left, right):
+        """Check that both files have the same size and modification time."""
+        if left.st_size == right.st_size:
+            if int(left.st_mtime) == int(right.st_mtime):
+                return True
+        return False
+
+    def get(self, paths, folder):
+        """Download the remote files to the local folder."""
+        items = []
+        client = self.clients.get()
+        try:
+            for remote in paths:
+                attributes = client.stat(remote)
+                size = attributes.st_size
+                local = os.path.join(folder, posixpath.basename(remote))
+                temp = f'{local}.part'
+
+                # File downloaded before by the completed transfer.
+                if os.path.exists(temp) is False:
+                    if os.path.exists(local) is True:
+                        if self.is_same(os.stat(local), attributes) is True:
+                            items.append([temp, local, None, attributes, []])
+                            continue
+
+                journal = Journal(
+                    self.get_journal(local), remote, size,
+                    attributes.st_mtime, self.part)
+                if os.path.exists(temp) is False:
+                    journal.reset()
+                if len(journal.done) == 0:
+                    with open(temp, 'wb') as file:
+                        file.truncate(size)
+
+                ranges = list(self.get_ranges(size, journal))
+                items.append([temp, local, journal, attributes, ranges])
+        finally:
+            self.clients.put(client)
+
+        def complete(item):
+            temp, local, journal, attributes, ranges = item
+            if journal is not None:
+                os.replace(temp, local)
+                os.utime(local, (attributes.st_atime, attributes.st_mtime))
+                journal.remove()
+            return local
+
+        return self.run(items, self.fetch, complete)
+
+    def put(self, paths, folder):
+        """Upload the local files to the remote folder."""
+        items = []
+        client = self.clients.get()
+        try:
+            for local in paths:
+                attributes = os.stat(local)
+                size = attributes.st_size
+                remote = posixpath.join(folder, os.path.basename(local))
+                temp = f'{remote}.part'
+
+                try:
+                    client.stat(temp)
+                except FileNotFoundError:
+                    exists = False
+                else:
+                    exists = True
+
+                # File uploaded before by the completed transfer.
+                if exists is False:
+                    try:
+                        current = client.stat(remote)
+                    except FileNotFoundError:
+                        pass
+                    else:
+                        if self.is_same(current, attributes) is True:
+                            items.append(
+                                [local, temp, remote, None, attributes, []])
+                            continue
+
+                journal = Journal(
+                    self.get_journal(local), remote, size,
+                    attributes.st_mtime, self.part)
+                if exists is False:
+                    journal.reset()
+                if len(journal.done) == 0:
+                    with client.open(temp, 'wb') as file:
+                        file.truncate(size)
+
+                ranges = list(self.get_ranges(size, journal))
+                items.append(
+                    [local, temp, remote, journal, attributes, ranges])
+        finally:
+            self.clients.put(client)
+
+        def complete(item):
+            local, temp, remote, journal, attributes, ranges = item
+            if journal is None:
+                return remote
+            client = self.clients.get()
+            try:
+                try:
+                    client.posix_rename(temp, remote)
+                except IOError:
+                    # Server does not support atomic rename extension.
+                    try:
+                        client.remove(remote)
+                    except FileNotFoundError:
+                        pass
+                    client.rename(temp, remote)
+                times = (int(attributes.st_atime), int(attributes.st_mtime))
+                client.utime(remote, times)
+            finally:
+                self.clients.put(client)
+            journal.remove()
+            return remote
+
+        return self.run(items, self.send, complete)
+
+    def run(self, items, function, complete):
+        """
+        Transfer all ranges of all files by the workers. File is completed
+        as soon as its last range is done. All ranges are tried even when some
+        fail so the progress of others is kept in journals.
+        """
+        pending = {}
+        results = {}
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            tasks = []
+            for index, item in enumerate(items):
+                ranges = item[-1]
+                if len(ranges) == 0:
+                    results[index] = complete(item)
+                    continue
+                pending[index] = len(ranges)
+                for offset, length in ranges:
+                    task = pool.submit(function, item, offset, length)
+                    tasks.append([task, index, item])
+
+            errors = []
+            for task, index, item in tasks:
+                try:
+                    task.result()
+                except Exception as error:
+                    errors.append(error)
+                    continue
+                pending[index] -= 1
+                if pending[index] == 0:
+                    results[index] = complete(item)
+
+        if len(errors) > 0:
+            raise errors[0]
+        return [results[index] for index in sorted(results)]
+
+    def fetch(self, item, offset, length):
+        """Download one range of the remote file and write it at offset."""
+        temp, local, journal, attributes, ranges = item
+        remote = journal.header['source']
+
+        blocks = []
+        position = offset
+        while position < offset + length:
+            size = min(self.block, offset + length - position)
+            blocks.append((position, size))
+            position += size
+
+        client = self.clients.get()
+        try:
+            with client.open(remote, 'rb') as source:
+                with open(temp, 'r+b') as target:
+                    target.seek(offset)
+                    for data in source.readv(blocks):
+                        target.write(data)
+                    target.flush()
+                    os.fsync(target.fileno())
+        finally:
+            self.clients.put(client)
+        journal.save(offset)
+        pass
+
+    def send(self, item, offset, length):
+        """Upload one range of the local file and write it at offset."""
+        local, temp, remote, journal, attributes, ranges = item
+
+        client = self.clients.get()
+        try:
+            with open(local, 'rb') as source:
+                with client.open(temp, 'r+b') as target:
+                    target.set_pipelined(True)
+                    source.seek(offset)
+                    target.seek(offset)
+                    rest = length
+                    while rest > 0:
+                        data = source.read(min(self.block, rest))
+                        if len(data) == 0:
+                            raise EOFError(f'File <{local}> was truncated.')
+                        target.write(data)
+                        rest -= len(data)
+        finally:
+            self.clients.put(client)
+        journal.save(offset)
+        pass
@@ -0,0 +1,20 @@
+from pypyrus_etl.objects import Base
+
+class File(Base):
+    """
+    This class represents a file object with its description. Path may be
+    a pattern matching several files of the same format.
+    """
+    def __init__(
+        self, name, path=None, format='csv', delimiter=',', quotechar='"',
+        header=True, encoding='utf-8', widths=None, pipeline=None
+    ):
+        super().__init__(name, pipeline=pipeline)
+        self.path = path
+        self.format = format.lower()
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.header = header
+        self.encoding = encoding
+        self.widths = widths
+        pass
@@ -2,15 +2,16 @@ from pypyrus_etl.nodes.host import Host
 from pypyrus_etl.nodes.link import Link
 from pypyrus_etl.nodes.database import Database
 
+from pypyrus_etl.objects.file import File
 from pypyrus_etl.objects.table import Table
 
-from pypyrus_etl.pipelines import table
-
 class Pipeline():
     def __new__(
         self, name, source, object, target, config,
         run_timestamp=None, log=None, job=None
     ):
+        # Pipeline modules are imported only when pipeline is requested.
+        from pypyrus_etl.pipelines import table, file
         # ETL of objects from one DB to another using dblink.
         if isinstance(source, Link) is True:
             if isinstance(target, Database) is True:
@@ -18,11 +19,33 @@ class Pipeline():
                     return table.dblink.table.Pipeline(
                         name, source, object, target, config,
                         run_timestamp=run_timestamp, log=log, job=job)
+        # ETL of objects from one DB to another streamed through the
+        # application.
+        elif isinstance(source, Database) is True:
+            if isinstance(target, Database) is True:
+                if isinstance(object, Table) is True:
+                    return table.database.table.Pipeline(
+                        name, source, object, target, config,
+                        run_timestamp=run_timestamp, log=log, job=job)
+        # ETL of files from the remote host to DB streamed over SFTP.
+        elif isinstance(source, Host) is True:
+            if isinstance(target, Database) is True:
+                if isinstance(object, File) is True:
+                    return file.sftp.table.Pipeline(
+                        name, source, object, target, config,
+                        run_timestamp=run_timestamp, log=log, job=job)
 
-# class Pipelines():
-#     def __new__(self, source, target, folder, log=None):
-#         # ETL of objects from one DB to another using dblink.
-#         if isinstance(source, etl.Link) is True:
-#             if isinstance(target, etl.Database) is True:
-#                 return etl.pipeline.dblink.Pipelines(
-#                     source, target, folder, log=log)
+class Pipelines():
+    def __new__(
+        self, source, target, folder, run_timestamp=None, log=None, job=None,
+        workers=4, source_limit=None, target_limit=None
+    ):
+        from pypyrus_etl.pipelines import table
+        # ETL of objects from one DB to another using dblink.
+        if isinstance(source, Link) is True:
+            if isinstance(target, Database) is True:
+                return table.dblink.table.Pipelines(
+                    source, target, folder,
+                    run_timestamp=run_timestamp, log=log, job=job,
+                    workers=workers, source_limit=source_limit,
+                    target_limit=target_limit)
@@ -0,0 +1 @@
+from .sftp import table
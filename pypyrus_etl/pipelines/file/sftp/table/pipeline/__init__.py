@@ -0,0 +1,11 @@
+from pypyrus_etl.pipelines.table.dblink.table import pipeline
+
+from .tools import Config, Parser
+
+class Pipeline(pipeline.Pipeline):
+    """
+    ETL pipeline for files read from the remote host over SFTP and loaded
+    to the table in the target database.
+    """
+    Config = Config
+    Parser = Parser
@@ -0,0 +1,161 @@
+import csv
+import decimal
+import datetime
+import sqlalchemy as sql
+
+from pypyrus_etl.pipelines.table.database.table.pipeline import objects
+
+class Medium(objects.Medium):
+    """
+    Represents medium object of that ETL pipeline filled with the data
+    streamed from the files on the remote host.
+    """
+
+    def get_fields(self):
+        """
+        Get descriptions of the file fields. Fields are the configured
+        columns that are not new in the order of the configuration or at the
+        configured positions.
+        """
+        config = self.pipeline.config
+        columns = config.data.get('columns')
+        fields = [
+            column for column in columns
+            if column.get('new', False) is False]
+        for index, column in enumerate(fields):
+            position = column.get('position', index)
+            yield column, position
+
+    def parse_columns(self):
+        """Define the columns of the medium table as the file fields."""
+        config = self.pipeline.config
+        for column, position in self.get_fields():
+            name = column['name']
+
+            datatype = config.parse_column_datatype(
+                name, column.get('type'), None, None, None)
+            length = config.parse_column_length(
+                name, column.get('length'), None, None, None)
+            precision = column.get('precision')
+            scale = column.get('scale')
+            datatype = config.compile_column_datatype(
+                datatype, length, precision, scale)
+
+            yield sql.Column(name.lower(), datatype)
+
+    def get_converter(self, column):
+        """Get the function converting the field text to the column value."""
+        datatype = (column.get('type') or 'VARCHAR').upper()
+        format = column.get('format')
+
+        def convert(value):
+            if value is None or value == '':
+                return None
+            elif datatype in ['INTEGER', 'INT']:
+                return int(value)
+            elif datatype in ['NUMBER', 'DECIMAL', 'NUMERIC']:
+                return decimal.Decimal(value)
+            elif datatype in ['FLOAT', 'REAL', 'DOUBLE']:
+                return float(value)
+            elif datatype in ['DATE']:
+                if format is not None:
+                    return datetime.datetime.strptime(value, format).date()
+                return datetime.date.fromisoformat(value)
+            elif datatype in ['DATETIME', 'TIMESTAMP']:
+                if format is not None:
+                    return datetime.datetime.strptime(value, format)
+                return datetime.datetime.fromisoformat(value)
+            elif datatype in ['BOOL', 'BOOLEAN']:
+                return value.lower() in ['1', 't', 'true', 'y', 'yes']
+            else:
+                return value
+        return convert
+
+    def insert(self):
+        host = self.pipeline.source
+        file = self.pipeline.input
+        target = self.pipeline.target
+
+        log = self.pipeline.log
+
+        if any(char in file.path for char in '*?[') is True:
+            paths = host.find(file.path)
+        else:
+            paths = [file.path]
+
+        log.sys.info(
+            'Load data '\
+            f'from <{host.name}:{file.path}> '\
+            f'to <{target.name}.{self.schema}.{self.name}>.')
+        log.sys.info(f'Files found <{len(paths)}>.')
+
+        count = 0
+        for path in paths:
+            log.sys.info(f'Read file <{path}>.')
+            count += self.stream(self.fetch(path))
+        log.count('found', count)
+        log.sys.info(f'Insert completed with <{count}> records.')
+        return count
+
+    def fetch(self, path):
+        """
+        Read the remote file as the stream, parse it incrementally and return
+        it by chunks of rows.
+        """
+        host = self.pipeline.source
+        file = self.pipeline.input
+        config = self.pipeline.config
+
+        stream = config.data.get('stream') or {}
+        chunk = stream.get('chunk', 10000)
+        block = stream.get('block', 32768)
+        window = stream.get('window', 64)
+
+        fields = []
+        for column, position in self.get_fields():
+            name = column['name'].lower()
+            converter = self.get_converter(column)
+            fields.append([name, position, converter])
+
+        reader = host.open(
+            path, encoding=file.encoding, block=block, window=window)
+        try:
+            if file.format == 'csv':
+                records = csv.reader(
+                    reader, delimiter=file.delimiter,
+                    quotechar=file.quotechar)
+            elif file.format == 'fixed':
+                records = self.split(reader, file.widths)
+            else:
+                raise ValueError(f'Unknown file format <{file.format}>.')
+
+            if file.header is True:
+                next(records, None)
+
+            rows = []
+            for record in records:
+                row = {}
+                for name, position, converter in fields:
+                    if position < len(record):
+                        row[name] = converter(record[position])
+                    else:
+                        row[name] = None
+                rows.append(row)
+                if len(rows) >= chunk:
+                    yield rows
+                    rows = []
+            if len(rows) > 0:
+                yield rows
+        finally:
+            reader.close()
+
+    def split(self, reader, widths):
+        """Split lines of the fixed width file to the fields."""
+        for line in reader:
+            line = line.rstrip('\r\n')
+            record = []
+            start = 0
+            for width in widths:
+                record.append(line[start:start+width].strip())
+                start += width
+            yield record
@@ -0,0 +1,29 @@
+from pypyrus_etl.pipelines.table.dblink.table.pipeline import tools
+
+class Config(tools.Config):
+    """
+    That class represents the configurator for an ETL process for files
+    loaded from the remote host to the target database. Files have no
+    catalog so column types are taken only from the configuration.
+    """
+    def parse_column_source(self, column):
+        return None, None, None
+
+    def parse_catalog(self):
+        pass
+
+    def describe_table(self, table, schema, link):
+        return {}
+
+    def parse_column_datatype(self, name, datatype, table, schema, link):
+        """
+        Define column datatype according to configuration. Columns without
+        type are strings.
+        """
+        datatype = datatype or 'VARCHAR'
+        return super().parse_column_datatype(
+            name, datatype, table, schema, link)
+
+    def parse_column_length(self, name, length, table, schema, link):
+        """Define column length according to configuration."""
+        return length or 4000
@@ -0,0 +1,38 @@
+from pypyrus_etl.pipelines.table.dblink.table.pipeline import tools
+
+from ..objects import Medium
+
+class Parser(tools.Parser):
+    """
+    That class represents the parser used to process some objects during
+    the ETL process of files.
+    """
+    def parse_input(self):
+        pipeline = self.pipeline
+        raw = pipeline.raw
+        config = pipeline.config
+
+        # File description can be completed in the configuration.
+        file = config.data.get('file')
+        if isinstance(file, dict) is True:
+            for key in [
+                'path', 'format', 'delimiter', 'quotechar', 'header',
+                'encoding', 'widths'
+            ]:
+                if key in file:
+                    setattr(raw, key, file[key])
+            raw.format = raw.format.lower()
+
+        raw.pipeline = pipeline
+        return raw
+
+    def parse_medium(self):
+        pipeline = self.pipeline
+        db = pipeline.target
+        config = pipeline.config
+
+        name = config.parse_table_name('raw')
+        schema = db.schema
+
+        object = Medium(name, schema=schema, database=db, pipeline=pipeline)
+        return object
@@ -1 +1,2 @@
 from .dblink import table
+from . import database
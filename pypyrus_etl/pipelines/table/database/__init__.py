@@ -0,0 +1 @@
+from .table import pipeline
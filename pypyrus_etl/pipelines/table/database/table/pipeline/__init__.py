@@ -0,0 +1,12 @@
+from pypyrus_etl.pipelines.table.dblink.table import pipeline
+
+from .tools import Config, Parser
+
+class Pipeline(pipeline.Pipeline):
+    """
+    ETL pipeline for objects loaded from one database to another without
+    dblink. Data is read from the source in chunks and inserted into the
+    medium table by the pipeline itself.
+    """
+    Config = Config
+    Parser = Parser
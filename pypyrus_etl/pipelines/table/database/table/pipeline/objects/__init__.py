@@ -0,0 +1 @@
+from .medium import Medium
@@ -0,0 +1,219 @@
+import queue
+import hashlib
+import threading
+import sqlalchemy as sql
+
+from pypyrus_etl.nodes.database import profiler
+from pypyrus_etl.pipelines.table.dblink.table.pipeline import objects
+
+class Medium(objects.Medium):
+    """
+    Represents medium object of that ETL pipeline filled with the data
+    streamed from the source database.
+    """
+
+    def create(self):
+        db = self.database
+        tbname = self.name
+
+        log = self.pipeline.log
+
+        log.sys.info(f'Create table <{db.name}.{self.schema}.{self.name}>.')
+
+        # Table dropped before is replaced with the new definition.
+        if tbname in db.metadata.tables:
+            db.metadata.remove(db.metadata.tables[tbname])
+
+        params = {}
+        type = self.get_type()
+        if type == 'temporary':
+            params['prefixes'] = ['GLOBAL TEMPORARY']
+            params['oracle_on_commit'] = 'PRESERVE ROWS'
+        elif type == 'unlogged':
+            params['prefixes'] = ['UNLOGGED']
+        # Fingerprint of the structure is kept to reuse the table later.
+        if db.engine.dialect.supports_comments is True:
+            params['comment'] = f'etl:{self.get_fingerprint()}'
+
+        columns = self.parse_columns()
+        table = sql.Table(tbname, db.metadata, *columns, **params)
+        table.create(db.engine)
+        if type == 'table' and self.pipeline.profile.is_nologging() is True:
+            db.connection.execute(f'ALTER TABLE {tbname} NOLOGGING')
+
+        self.data = table
+        log.sys.info('Table created.')
+        pass
+
+    def get_fingerprint(self):
+        """Get the fingerprint of the table structure made by the columns."""
+        db = self.database
+
+        parts = [self.get_type(), str(self.pipeline.profile.is_nologging())]
+        for column in self.parse_columns():
+            datatype = column.type.compile(dialect=db.engine.dialect)
+            parts.append(f'{column.name} {datatype}')
+        parts = '\n'.join(parts)
+        return hashlib.md5(parts.encode()).hexdigest()
+
+    def parse_columns(self):
+        """
+        Define the columns of the medium table as they are selected by the
+        query from the source tables.
+        """
+        config = self.pipeline.config
+        query = config.data.get('query')
+
+        sources = []
+        select_all = query.get('select_all', True)
+        if select_all is True:
+            table = query.get('table')
+            schema = query.get('schema')
+            for name in config.describe_table(table, schema, None):
+                sources.append([name, {}, table, schema])
+        elif select_all is False:
+            for column in config.data.get('columns'):
+                load = column.get('load', True)
+                new = column.get('new', False)
+                if load is True and new is False:
+                    name = column['name']
+                    table, schema, link = config.parse_column_source(column)
+                    sources.append([name, column, table, schema])
+
+        for name, column, table, schema in sources:
+            description = config.get_catalog_column(name, table, schema, None)
+
+            datatype = column.get('type') or description.get('type')
+            datatype = config.parse_column_datatype(
+                name, datatype or 'VARCHAR', table, schema, None)
+            length = config.parse_column_length(
+                name, column.get('length'), table, schema, None)
+            precision = config.parse_column_precision(
+                name, column.get('precision'), table, schema, None)
+            scale = config.parse_column_scale(
+                name, column.get('scale'), table, schema, None)
+            datatype = config.compile_column_datatype(
+                datatype, length, precision, scale)
+
+            yield sql.Column(name.lower(), datatype)
+
+        # Watermark column is selected by the query in the watermark mode.
+        watermark = config.parse_watermark()
+        if watermark is not None:
+            pointer, name = watermark
+            table = query.get('table')
+            if pointer not in [table, query.get('alias')]:
+                table = pointer
+            schema = query.get('schema')
+            description = config.get_catalog_column(name, table, schema, None)
+
+            datatype = description.get('type') or 'NUMBER'
+            datatype = config.parse_column_datatype(
+                name, datatype, table, schema, None)
+            datatype = config.compile_column_datatype(
+                datatype, description.get('length'),
+                description.get('precision'), description.get('scale'))
+
+            yield sql.Column('etl_watermark', datatype)
+
+    def insert(self):
+        source = self.pipeline.source
+        input = self.pipeline.input
+        target = self.pipeline.target
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        query = config.parse_query()
+
+        log.sys.info(
+            'Load data '\
+            f'from <{source.name}.{input.schema}.{input.name}> '\
+            f'to <{target.name}.{self.schema}.{self.name}>.')
+        log.sys.info(f'With query:\n\n{query}\n')
+
+        chunks = self.fetch(query)
+        count = self.stream(chunks)
+        log.count('found', count)
+        log.sys.info(f'Insert completed with <{count}> records.')
+        return count
+
+    def fetch(self, query):
+        """
+        Read the query result from the source database with server side
+        cursor and return it by chunks of rows.
+        """
+        source = self.pipeline.source
+        config = self.pipeline.config
+
+        stream = config.data.get('stream') or {}
+        chunk = stream.get('chunk', 10000)
+
+        connection = source.connection.execution_options(stream_results=True)
+        try:
+            result = connection.execute(query)
+            keys = [key.lower() for key in result.keys()]
+            while True:
+                rows = result.fetchmany(chunk)
+                if len(rows) == 0:
+                    break
+                yield [dict(zip(keys, row)) for row in rows]
+            result.close()
+        finally:
+            source.release()
+
+    def stream(self, chunks):
+        """
+        Insert chunks to the medium table. Chunks are fetched by another
+        thread while the current one inserts them. Queue between threads is
+        bounded so memory stays flat with any volume of data.
+        """
+        db = self.database
+        config = self.pipeline.config
+
+        stream = config.data.get('stream') or {}
+        size = stream.get('queue', 4)
+
+        chunks_queue = queue.Queue(maxsize=size)
+        stop = threading.Event()
+        errors = []
+
+        def put(item):
+            while stop.is_set() is False:
+                try:
+                    chunks_queue.put(item, timeout=1)
+                except queue.Full:
+                    continue
+                else:
+                    return True
+            return False
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    if put(chunk) is False:
+                        break
+            except BaseException as error:
+                errors.append(error)
+            finally:
+                put(None)
+            pass
+
+        producer = threading.Thread(
+            target=profiler.bind(produce), daemon=True)
+        producer.start()
+
+        count = 0
+        try:
+            while True:
+                chunk = chunks_queue.get()
+                if chunk is None:
+                    break
+                count += db.bulk_insert(self.data, chunk)
+        finally:
+            stop.set()
+            producer.join()
+
+        if len(errors) > 0:
+            raise errors[0]
+        return count
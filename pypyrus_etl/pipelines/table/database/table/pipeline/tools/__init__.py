@@ -0,0 +1,2 @@
+from .config import Config
+from .parser import Parser
@@ -0,0 +1,63 @@
+import sqlalchemy as sql
+
+from pypyrus_etl.pipelines.table.dblink.table.pipeline import tools
+
+class Config(tools.Config):
+    """
+    That class represents the configurator for an ETL process for objects
+    loaded from the source to the target database without dblink.
+    """
+    def describe_table(self, table, schema, link):
+        """
+        Get the description of all table columns from the source database
+        and keep it in the catalog index for the rest of the run. Table
+        without the schema is taken from the schema of the user in Oracle
+        and from the default schema of the connection in other databases.
+        """
+        source = self.pipeline.source
+
+        table = table.upper()
+        if schema is None and source.vendor == 'oracle':
+            schema = source.schema
+        schema = schema.upper() if schema else None
+        key = (link, schema, table)
+        if key not in self.catalog:
+            inspector = sql.inspect(source.engine)
+
+            columns = {}
+            reflection = inspector.get_columns(
+                table.lower(), schema=schema.lower() if schema else None)
+            for column in reflection:
+                name = column['name'].upper()
+                columns[name] = self.describe_column(column['type'])
+            self.catalog[key] = columns
+        return self.catalog[key]
+
+    def describe_column(self, type):
+        """
+        Transform the reflected column type to the description used in the
+        catalog index.
+        """
+        description = {
+            'type': 'VARCHAR', 'length': None,
+            'precision': None, 'scale': None}
+        if isinstance(type, sql.Integer) is True:
+            description['type'] = 'INTEGER'
+        elif isinstance(type, sql.Float) is True:
+            description['type'] = 'FLOAT'
+            description['precision'] = type.precision
+        elif isinstance(type, sql.Numeric) is True:
+            description['type'] = 'NUMERIC'
+            description['precision'] = type.precision
+            description['scale'] = type.scale
+        elif isinstance(type, sql.DateTime) is True:
+            description['type'] = 'TIMESTAMP'
+        elif isinstance(type, sql.Date) is True:
+            description['type'] = 'DATE'
+        elif isinstance(type, sql.Time) is True:
+            description['type'] = 'TIME'
+        elif isinstance(type, sql.Boolean) is True:
+            description['type'] = 'BOOLEAN'
+        elif isinstance(type, sql.String) is True:
+            description['length'] = type.length
+        return description
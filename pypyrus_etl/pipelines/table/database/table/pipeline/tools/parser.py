@@ -0,0 +1,19 @@
+from pypyrus_etl.pipelines.table.dblink.table.pipeline import tools
+
+from ..objects import Medium
+
+class Parser(tools.Parser):
+    """
+    That class represents the parser used to process some objects during
+    the ETL process from one database to another.
+    """
+    def parse_medium(self):
+        pipeline = self.pipeline
+        db = pipeline.target
+        config = pipeline.config
+
+        name = config.parse_table_name('raw')
+        schema = db.schema
+
+        object = Medium(name, schema=schema, database=db, pipeline=pipeline)
+        return object
@@ -1 +1 @@
-from .pipeline import Pipeline
+from .pipeline import Pipeline, Pipelines
@@ -1,19 +1,35 @@
 import os
+import time
+import getpass
+import threading
 import sqlalchemy as sql
+import pypyrus_logbook as logbook
 
 from datetime import datetime
+from concurrent import futures
 
-from .tools import Log, Config, Parser
+from pypyrus_etl.nodes.database import Database, profiler
+from pypyrus_etl.objects.table import Table
+
+from .tools import Log, Config, Parser, Cache, Profile
 from .procs import Extractor, Transformer, Loader
 
 class Pipeline():
+    # Tools that are replaced in the other variants of the pipeline.
+    Config = Config
+    Parser = Parser
+
     def __init__(
         self, name, source, object, target, config,
         run_timestamp=None, log=None, job=None
     ):
         self.name = name
 
-        username = os.getlogin().upper()
+        # Login name is not available without the controlling terminal.
+        try:
+            username = os.getlogin().upper()
+        except OSError:
+            username = getpass.getuser().upper()
         if job is not None:
             self.run_timestamp = job.trigger
             self.run_by = 'JOB' if job.auto is True else username
@@ -30,8 +46,17 @@ class Pipeline():
         self.target = target
 
         self.log = Log(self, sys=log)
-        self.config = Config(self, object=config)
-        self.parser = Parser(self)
+        self.config = self.Config(self, object=config)
+        self.cache = Cache(self)
+        self.profile = Profile(self)
+        self.parser = self.Parser(self)
+
+        # Statements are recorded when profiling is configured.
+        profile = self.config.data.get('profile')
+        if isinstance(profile, dict) is True:
+            for node in [source, target]:
+                if isinstance(node, Database) is True:
+                    node.profile(**profile)
 
         self.extractor = Extractor(self)
         self.transformer = Transformer(self)
@@ -63,7 +88,9 @@ class Pipeline():
         """
         Implement all necessary actions at the start of the ETL process.
         """
+        profiler.set_context(self.name, 'prepare')
         self.log.sys.subhead('prepare')
+        start = time.perf_counter()
         try:
             self.log.sys.info(f'Opening pipeline <{self.name}>...')
             # Open new record in the DB log.
@@ -74,99 +101,403 @@ class Pipeline():
             self.medium.prepare()
             # Prepare output table object.
             self.output.prepare()
+            # Record the load profile applied to the writing stages.
+            profile = self.profile.describe()
+            if profile is not None:
+                self.log.write(load_profile=profile)
         except:
             self.log.sys.critical()
         else:
             self.log.sys.info('Preparation finished.')
+        finally:
+            self.log.measure('prepare', start)
+            # Connection is returned to the pool between stages.
+            self.target.release()
         pass
 
     def extract(self):
         """Launch the EXTRACT part."""
+        profiler.set_context(self.name, 'extract')
         self.log.sys.subhead('extract')
         self.log.sys.info(f'Going to extract...')
+        start = time.perf_counter()
         try:
+            self.profile.apply()
             self.extractor.run()
         except:
             self.log.process_error()
         else:
             self.log.process_extract_finished()
+        finally:
+            self.profile.reset()
+            self.log.measure('extract', start)
+            self.target.release()
         pass
 
     def transform(self, *args):
         """Launch the TRANSFORM part."""
+        profiler.set_context(self.name, 'transform')
         self.log.sys.subhead('transform')
         self.log.sys.info(f'Going to transform...')
+        start = time.perf_counter()
         try:
             self.transformer.run()
         except:
             self.log.process_error()
         else:
             self.log.process_transform_finished()
+        finally:
+            self.log.measure('transform', start)
+            self.target.release()
         pass
 
     def load(self):
         """Launch the LOAD part."""
+        profiler.set_context(self.name, 'load')
         self.log.sys.subhead('load')
         self.log.sys.info(f'Going to load...')
+        start = time.perf_counter()
         try:
+            self.profile.apply()
             self.loader.run()
         except:
             self.log.process_error()
         else:
             self.log.process_load_finished()
+        finally:
+            self.profile.reset()
+            self.log.measure('load', start)
+            self.target.release()
         pass
 
     def finalize(self):
         """
         Implement all necessary actions at the end of the ETL process.
         """
+        profiler.set_context(self.name, 'finalize')
+        start = time.perf_counter()
         self.log.sys.bound()
         try:
             self.log.sys.info(f'Closing pipeline <{self.name}>...')
             self.log.close()
         except:
             self.log.sys.warning()
+        finally:
+            self.log.measure('finalize', start)
+            self.clear()
+            self.target.unpin()
+            self.target.release()
+        try:
+            self.log.export()
+        except:
+            self.log.sys.warning()
         self.log.sys.info('Done!')
+        profiler.set_context()
         pass
 
-# class Pipelines():
-#     """
-#     This class represents set of pipelines where each separated pipeline has
-#     own configuration json file stored in special folder.
-#     """
-#     def __init__(self, source, target, folder, log=None):
-#         self.pipelines = []
-#         for tbname in os.listdir(folder):
-#
-#             json = f'{folder}/{tbname}/{tbname}.json'
-#             json = json if os.path.exists(json) is True else None
-#
-#             ini = f'{folder}/{tbname}/{tbname}.ini'
-#             ini = ini if os.path.exists(ini) is True else None
-#
-#             object = etl.table.Table(tbname, json=json, ini=ini)
-#             pipeline = Pipeline(source, target, object, log=log)
-#             self.pipelines.append(pipeline)
-#         pass
-#
-#     def __getitem__(self, key):
-#         return self.pipelines[key]
-#
-#     def __iter__(self):
-#         self.max = len(self.pipelines)
-#         self.n = 0
-#         return self
-#
-#     def __next__(self):
-#         n = self.n
-#         if self.n < self.max:
-#             self.n += 1
-#             return self.pipelines[n]
-#         else:
-#             raise StopIteration
-#
-#     def run_all(self):
-#         """Launch all nested ETL pipelines."""
-#         for pipeline in self.pipelines:
-#             pipeline.run()
-#         pass
+    def run_workers(self, function, items, workers):
+        """
+        Run the function for every item by the concurrent workers. Sessions
+        of the workers get the settings of the load profile and return their
+        connections when the item is done. Rows of the temporary medium are
+        seen only by its own session so items are run one by one then.
+        """
+        def run(item):
+            try:
+                self.profile.apply()
+                function(item)
+            finally:
+                self.profile.reset()
+                self.target.release()
+            pass
+
+        temporary = self.medium.get_type() == 'temporary'
+        if temporary is True:
+            self.log.sys.info('Items of temporary table are run one by one.')
+        if temporary is True or workers == 1 or len(items) <= 1:
+            for item in items:
+                function(item)
+        else:
+            with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(profiler.bind(run), items))
+        pass
+
+    def clear(self):
+        """
+        Truncate the temporary medium while its session is still pinned.
+        Rows of the temporary medium stay in the pooled session otherwise.
+        """
+        if self.target.is_pinned() is True:
+            try:
+                if self.medium.get_type() == 'temporary':
+                    self.medium.truncate()
+            except:
+                self.log.sys.warning()
+        pass
+
+class Pipelines():
+    """
+    This class represents set of pipelines where each separated pipeline has
+    own configuration json file stored in special folder. Pipelines are run
+    concurrently with the limited number of workers per source and target.
+    """
+    def __init__(
+        self, source, target, folder, run_timestamp=None, log=None, job=None,
+        workers=4, source_limit=None, target_limit=None
+    ):
+        self.source = source
+        self.target = target
+        self.folder = os.path.abspath(folder)
+        self.log = log or logbook.Log('pipelines')
+
+        self.workers = workers
+        self.source_limit = source_limit
+        self.target_limit = target_limit
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+        self.pipelines = []
+        for name, path in self.discover():
+            object = Table(name)
+            pipeline = Pipeline(
+                name, source, object, target, path,
+                run_timestamp=run_timestamp, log=log, job=job)
+            self.pipelines.append(pipeline)
+        self.summary = []
+        pass
+
+    def __getitem__(self, key):
+        return self.pipelines[key]
+
+    def __iter__(self):
+        return iter(self.pipelines)
+
+    def __len__(self):
+        return len(self.pipelines)
+
+    def discover(self):
+        """
+        Find configuration files in the folder. Configuration is either the
+        folder/name/name.json or the folder/name.json file.
+        """
+        for item in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, item)
+            if os.path.isdir(path) is True:
+                name = item
+                path = os.path.join(path, f'{name}.json')
+                if os.path.exists(path) is False:
+                    continue
+            elif item.endswith('.json') is True:
+                name = item[:-5]
+            else:
+                continue
+            yield name, path
+
+    def parse_limit(self, limit, name):
+        """Get the concurrency limit configured for the node name."""
+        if isinstance(limit, dict) is True:
+            return limit.get(name)
+        return limit
+
+    def get_semaphore(self, type, name):
+        """Get the semaphore limiting the concurrency on the node."""
+        limit = getattr(self, f'{type}_limit')
+        limit = self.parse_limit(limit, name)
+        if limit is not None:
+            key = (type, name)
+            with self.lock:
+                if key not in self.semaphores:
+                    semaphore = threading.BoundedSemaphore(limit)
+                    self.semaphores[key] = semaphore
+                return self.semaphores[key]
+
+    def get_nodes(self, pipeline):
+        """Get names of the source and target nodes used by the pipeline."""
+        query = pipeline.config.data.get('query') or {}
+        source = query.get('link') or pipeline.source.name
+        target = pipeline.target.name
+        return source, target
+
+    def run_one(self, pipeline):
+        """Run the pipeline within the limits of its source and target."""
+        source, target = self.get_nodes(pipeline)
+        # Semaphores are always taken in the same order to avoid deadlocks.
+        semaphores = [
+            self.get_semaphore('source', source),
+            self.get_semaphore('target', target)]
+        semaphores = [item for item in semaphores if item is not None]
+
+        for semaphore in semaphores:
+            semaphore.acquire()
+        start = time.monotonic()
+        error = None
+        try:
+            pipeline.run()
+        except BaseException as exception:
+            error = repr(exception)
+        finally:
+            duration = time.monotonic() - start
+            # Connection pinned by the failed pipeline is returned as well.
+            pipeline.clear()
+            pipeline.target.unpin()
+            pipeline.target.release()
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+        return self.summarize(pipeline, duration, error)
+
+    def summarize(self, pipeline, duration, error=None):
+        """Get the pipeline results from its record in the DB log."""
+        log = pipeline.log
+        result = {
+            'name': pipeline.name,
+            'load_id': getattr(log, 'load_id', None),
+            'result': 'failed' if error is not None else 'done',
+            'duration': round(duration, 3),
+            'error': error}
+
+        table = getattr(log, 'table', None)
+        if table is not None and result['load_id'] is not None:
+            select = table.select().where(table.c.load_id == log.load_id)
+            try:
+                record = pipeline.target.connection.execute(select).first()
+            except Exception:
+                record = None
+            finally:
+                pipeline.target.release()
+            if record is not None:
+                for key in [
+                    'status', 'start_timestamp', 'end_timestamp',
+                    'records_found', 'records_loaded', 'records_updated',
+                    'records_error', 'records_merged'
+                ]:
+                    result[key] = record[key]
+                if str(record['status']) == '4':
+                    result['result'] = 'failed'
+        return result
+
+    def parse_dependencies(self):
+        """
+        Build the dependency graph of pipelines from the explicit depends_on
+        keys and the foreign keys referring to outputs of other pipelines.
+        """
+        names = [pipeline.name for pipeline in self.pipelines]
+        outputs = {
+            pipeline.output.name.lower(): pipeline.name
+            for pipeline in self.pipelines}
+
+        graph = {}
+        for pipeline in self.pipelines:
+            data = pipeline.config.data
+            parents = set()
+
+            depends_on = data.get('depends_on') or []
+            if isinstance(depends_on, str) is True:
+                depends_on = [depends_on]
+            for name in depends_on:
+                if name in names:
+                    parents.add(name)
+                elif name.lower() in outputs:
+                    parents.add(outputs[name.lower()])
+                else:
+                    self.log.warning(
+                        f'Pipeline <{pipeline.name}> depends on unknown '\
+                        f'pipeline <{name}>.')
+
+            # Referred tables that are not outputs of the other pipelines
+            # in the set are not dependencies.
+            tables = []
+            foreign_keys = data.get('foreign_keys') or []
+            for foreign_key in foreign_keys:
+                table = foreign_key.get('table')
+                if table is not None:
+                    tables.append(table)
+            columns = data.get('columns') or []
+            for column in columns:
+                foreign_key = column.get('foreign_key')
+                if isinstance(foreign_key, str) is True:
+                    parts = foreign_key.split('.')
+                    if len(parts) > 1:
+                        tables.append(parts[-2])
+            for table in tables:
+                table = table.split('.')[-1].lower()
+                if table in outputs:
+                    parents.add(outputs[table])
+
+            parents.discard(pipeline.name)
+            graph[pipeline.name] = parents
+
+        # Check that the graph has no cycles.
+        waiting = {name: set(parents) for name, parents in graph.items()}
+        while len(waiting) > 0:
+            ready = [
+                name for name, parents in waiting.items()
+                if len(parents) == 0]
+            if len(ready) == 0:
+                cycle = ', '.join(sorted(waiting))
+                raise ValueError(
+                    f'Dependency cycle between pipelines <{cycle}>.')
+            for name in ready:
+                waiting.pop(name)
+            for parents in waiting.values():
+                parents.difference_update(ready)
+        return graph
+
+    def run_all(self):
+        """
+        Launch all nested ETL pipelines and return the run summary. Each
+        pipeline starts as soon as all pipelines it depends on are done.
+        Pipelines depending on the failed ones are skipped.
+        """
+        graph = self.parse_dependencies()
+        pipelines = {pipeline.name: pipeline for pipeline in self.pipelines}
+        children = {name: [] for name in graph}
+        for name, parents in graph.items():
+            for parent in parents:
+                children[parent].append(name)
+
+        waiting = {name: set(parents) for name, parents in graph.items()}
+        results = {}
+
+        def skip(name, parent):
+            for child in children[name]:
+                if child in waiting:
+                    waiting.pop(child)
+                    results[child] = {
+                        'name': child, 'load_id': None, 'result': 'skipped',
+                        'duration': 0, 'error': f'Parent <{parent}> failed.'}
+                    skip(child, parent)
+            pass
+
+        self.log.info(
+            f'Running <{len(self.pipelines)}> pipelines '\
+            f'with <{self.workers}> workers...')
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while True:
+                ready = [
+                    name for name, parents in waiting.items()
+                    if len(parents) == 0]
+                for name in ready:
+                    waiting.pop(name)
+                    job = pool.submit(self.run_one, pipelines[name])
+                    running[job] = name
+                if len(running) == 0:
+                    break
+
+                done, _ = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED)
+                for job in done:
+                    name = running.pop(job)
+                    result = results[name] = job.result()
+                    if result['result'] == 'done':
+                        for child in children[name]:
+                            if child in waiting:
+                                waiting[child].discard(name)
+                    else:
+                        skip(name, name)
+
+        self.summary = [results[pipeline.name] for pipeline in self.pipelines]
+        done = len([item for item in self.summary if item['result'] == 'done'])
+        self.log.info(
+            f'Pipelines finished <{done}> of <{len(self.summary)}>.')
+        return self.summary
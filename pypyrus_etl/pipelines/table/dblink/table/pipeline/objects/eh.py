@@ -13,9 +13,7 @@ class ErrorHandler(Table):
 
         log.sys.info(f'Load table <{db.name}.{self.schema}.{self.name}>.')
 
-        table = sql.Table(
-            tbname, db.metadata,
-            autoload=True, autoload_with=db.engine)
+        table = self.pipeline.cache.reflect(tbname, db)
 
         self.data = table
         log.sys.info('Table loaded.')
@@ -1,3 +1,4 @@
+import hashlib
 import sqlalchemy as sql
 
 from pypyrus_etl.objects.table import Table
@@ -13,9 +14,7 @@ class Medium(Table):
 
         log.sys.info(f'Load table <{db.name}.{self.schema}.{self.name}>.')
 
-        table = sql.Table(
-            tbname, db.metadata,
-            autoload=True, autoload_with=db.engine)
+        table = self.pipeline.cache.reflect(tbname, db)
 
         self.data = table
         log.sys.info('Table loaded.')
@@ -31,7 +30,17 @@ class Medium(Table):
         # Create empty table with the same structure as in the source.
         log.sys.info(f'Create table <{db.name}.{self.schema}.{self.name}>.')
 
-        create = [f'CREATE TABLE {tbname} AS']
+        type = self.get_type()
+        if type == 'temporary':
+            create = [
+                f'CREATE GLOBAL TEMPORARY TABLE {tbname}',
+                'ON COMMIT PRESERVE ROWS AS']
+        elif type == 'unlogged':
+            create = [f'CREATE UNLOGGED TABLE {tbname} AS']
+        elif self.pipeline.profile.is_nologging() is True:
+            create = [f'CREATE TABLE {tbname} NOLOGGING AS']
+        else:
+            create = [f'CREATE TABLE {tbname} AS']
         select = config.parse_select()
         from_ = config.parse_from()
         join = config.parse_join()
@@ -48,10 +57,33 @@ class Medium(Table):
             tbname, db.metadata,
             autoload=True, autoload_with=db.engine)
 
+        # Fingerprint of the structure is kept to reuse the table later.
+        if db.engine.dialect.supports_comments is True:
+            table.comment = f'etl:{self.get_fingerprint()}'
+            db.connection.execute(sql.schema.SetTableComment(table))
+
         self.data = table
         log.sys.info('Table created.')
         pass
 
+    def truncate(self):
+        """Remove all records from the table."""
+        db = self.pipeline.target
+        tbname = self.name
+
+        log = self.pipeline.log
+
+        log.sys.info(
+            f'Truncate table <{db.name}.{self.schema}.{self.name}>.')
+        if db.vendor == 'sqlite':
+            db.connection.execute(self.data.delete())
+        else:
+            truncate = sql.text(f'TRUNCATE TABLE {tbname}').\
+                execution_options(autocommit=True)
+            db.connection.execute(truncate)
+        log.sys.info('Table truncated.')
+        pass
+
     def drop(self):
         db = self.pipeline.target
         tbname = self.name
@@ -61,12 +93,12 @@ class Medium(Table):
         log.sys.info(f'Drop table <{db.name}.{self.schema}.{self.name}>.')
 
         drop = self.data.drop(db.engine)
+        self.pipeline.cache.forget('table', tbname, self.schema)
         log.sys.info('Table dropped.')
         pass
 
     def insert(self):
         db = self.pipeline.target
-        tbname = self.name
 
         source = self.pipeline.source
         input = self.pipeline.input
@@ -75,29 +107,313 @@ class Medium(Table):
         log = self.pipeline.log
         config = self.pipeline.config
 
-        insert = f'INSERT INTO {tbname}\n'
-        insert += config.parse_query()
-
         log.sys.info(
             'Load data '\
             f'from <{source.name}.{input.schema}.{input.name}> '\
             f'to <{target.name}.{self.schema}.{self.name}>.')
+
+        slices = config.parse_slices()
+        if slices is not None:
+            self.insert_slices(slices)
+            return
+
+        insert = self.parse_insert()
+        insert += config.parse_query()
+
         log.sys.info(f'With query:\n\n{insert}\n')
 
-        db.connection.execute(insert)
-        log.sys.info('Insert completed.')
+        result = db.connection.execute(insert)
+        log.count('found', result.rowcount)
+        log.sys.info(f'Insert completed with <{result.rowcount}> records.')
+        pass
+
+    def parse_insert(self, statement='insert'):
+        """Get the head of the insert with the hint of the load profile."""
+        hint = self.pipeline.profile.get_hint(statement)
+        if hint is not None:
+            return f'INSERT {hint} INTO {self.name}\n'
+        return f'INSERT INTO {self.name}\n'
+
+    def insert_slices(self, slices):
+        """
+        Load data by the disjoint slices of the query running concurrently.
+        Every thread uses its own connection so slices are separate streams
+        over the dblink. Failed slice is retried alone as its statement is
+        rolled back entirely.
+        """
+        db = self.pipeline.target
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        options = config.data.get('slices')
+        workers = options.get('workers', len(slices))
+        retries = options.get('retries', 1)
+
+        # Progress of every slice is kept in the medium.
+        self.slices = []
+        for index, filter_ in enumerate(slices):
+            insert = self.parse_insert('slice')
+            insert += config.parse_query(slice=filter_)
+            self.slices.append({
+                'index': index, 'query': insert, 'status': 'new',
+                'attempts': 0, 'records': None, 'error': None})
+        log.sys.info(
+            f'Insert by <{len(slices)}> slices with <{workers}> workers.')
+        log.sys.info(f'With first slice query:\n\n{self.slices[0]["query"]}\n')
+
+        def run(slice):
+            index = slice['index']
+            while slice['status'] != 'done':
+                slice['attempts'] += 1
+                slice['status'] = 'running'
+                try:
+                    result = db.connection.execute(slice['query'])
+                except Exception as error:
+                    slice['status'] = 'failed'
+                    slice['error'] = error
+                    log.sys.info(
+                        f'Slice <{index}> failed '\
+                        f'on attempt <{slice["attempts"]}>: {error}')
+                    if slice['attempts'] > retries:
+                        break
+                else:
+                    slice['status'] = 'done'
+                    slice['records'] = result.rowcount
+                    log.sys.info(
+                        f'Slice <{index}> completed '\
+                        f'with <{slice["records"]}> records.')
+            pass
+
+        self.pipeline.run_workers(run, self.slices, workers)
+
+        failed = [
+            slice['index'] for slice in self.slices
+            if slice['status'] != 'done']
+        if len(failed) > 0:
+            error = self.slices[failed[0]]['error']
+            raise RuntimeError(f'Slices <{failed}> failed.') from error
+
+        records = 0
+        for slice in self.slices:
+            log.count('found', slice['records'])
+            records += slice['records']
+        log.sys.info(f'Insert completed with <{records}> records.')
         pass
 
     def prepare(self):
         db = self.pipeline.target
         tbname = self.name
 
+        config = self.pipeline.config
+
+        options = config.data.get('medium') or {}
+        reuse = options.get('reuse', False)
+
+        # Session of the temporary table is kept for the whole process.
+        if self.get_type() == 'temporary':
+            db.pin()
+
         if db.engine.has_table(tbname) is True:
             self.load()
+            if reuse is True and self.is_reusable() is True:
+                self.truncate()
+                return
             self.drop()
         self.create()
         pass
 
+    def get_type(self):
+        """
+        Get the type of the table from the configuration. Temporary tables are
+        made in Oracle and unlogged ones in PostgreSQL, other databases make
+        the regular table.
+        """
+        db = self.pipeline.target
+        config = self.pipeline.config
+
+        options = config.data.get('medium') or {}
+        type = options.get('type', 'table')
+        if type == 'temporary' and db.vendor == 'oracle':
+            return 'temporary'
+        elif type == 'unlogged' and db.vendor == 'postgresql':
+            return 'unlogged'
+        return 'table'
+
+    def get_fingerprint(self):
+        """
+        Get the fingerprint of the table structure as it is defined by the
+        query from the source tables.
+        """
+        config = self.pipeline.config
+
+        parts = [self.get_type(), str(self.pipeline.profile.is_nologging())]
+        for part in [
+            config.parse_select(), config.parse_from(), config.parse_join()
+        ]:
+            if part is not None:
+                parts.append(part)
+        parts = '\n'.join(parts)
+        return hashlib.md5(parts.encode()).hexdigest()
+
+    def is_reusable(self):
+        """
+        Check that existing table was made with the same structure so it can
+        be truncated instead of the recreation.
+        """
+        db = self.pipeline.target
+        tbname = self.name
+
+        log = self.pipeline.log
+
+        if db.engine.dialect.supports_comments is False:
+            log.sys.info(f'Table comments are not supported by <{db.vendor}>.')
+            return False
+
+        inspector = sql.inspect(db.engine)
+        comment = inspector.get_table_comment(tbname).get('text')
+        fingerprint = f'etl:{self.get_fingerprint()}'
+        if comment == fingerprint:
+            log.sys.info(f'Table <{tbname}> is reused.')
+            return True
+        log.sys.info(f'Table <{tbname}> structure has changed.')
+        return False
+
+    def get_rowid(self):
+        """Get the physical row address column if the database has it."""
+        db = self.pipeline.target
+        if db.vendor in ['oracle', 'sqlite']:
+            return sql.literal_column(f'{self.name}.rowid')
+        elif db.vendor == 'postgresql':
+            return sql.literal_column(f'{self.name}.ctid')
+
+    def process_conflicts(
+        self, duplicates=True, primary_key=True, batch_only=False
+    ):
+        """
+        Move records in conflict with the output table or with each other to
+        the error handler. Every record of the medium is classified once as
+        the duplicate of output record, the primary key conflict with output
+        record or the duplicate inside the medium itself. Only the last is
+        checked with batch_only. Classified records are moved by one insert
+        and one delete. Databases without physical row addresses use the
+        separate checks.
+        """
+        if duplicates is False and primary_key is False:
+            return
+
+        rowid = self.get_rowid()
+        if rowid is None and batch_only is True:
+            log = self.pipeline.log
+            log.sys.info('Batch duplicates are not checked.')
+            return
+        elif rowid is None:
+            if duplicates is True:
+                self.process_duplicates()
+            if primary_key is True:
+                self.process_primary_key_duplicates()
+            return
+
+        pipeline = self.pipeline
+
+        db = pipeline.target
+        output = pipeline.output
+
+        log = pipeline.log
+        config = pipeline.config
+        parser = pipeline.parser
+
+        log.sys.info(
+            'Process record conflicts '\
+            f'between <{db.name}.{self.schema}.{self.name}> '\
+            f'and <{db.name}.{output.schema}.{output.name}>.')
+
+        medium = self.data
+        table = output.data
+
+        # Pairs of medium and output columns that are loaded.
+        pairs = []
+        for column in config.data['columns']:
+            if column.get('new', False) is False:
+                if column.get('load', True) is True:
+                    name = column['name']
+                    rename = column.get('rename') or name
+                    pairs.append([medium.c[name], table.c[rename]])
+
+        keys = []
+        for key in table.primary_key:
+            column = config.get_column(name=key.name, original=False)
+            keys.append([medium.c[column['name']], key])
+
+        # Conditions are checked in the order of their priority.
+        whens = []
+        if duplicates is True and batch_only is False:
+            condition = [left == right for left, right in pairs]
+            condition = sql.exists().where(sql.and_(*condition))
+            whens.append((condition, 'duplicate'))
+        if primary_key is True and len(keys) > 0:
+            if batch_only is False:
+                condition = [left == right for left, right in keys]
+                condition = sql.exists().where(sql.and_(*condition))
+                whens.append((condition, 'pk_error'))
+            partition = [left for left, right in keys]
+        else:
+            partition = [left for left, right in pairs]
+        row_number = sql.func.row_number().\
+            over(partition_by=partition, order_by=rowid)
+        whens.append((row_number > 1, 'batch_dup'))
+
+        load_id = sql.literal(log.load_id).label('load_id')
+        error_type = sql.case(whens).label('error_type')
+        classified = sql.select([rowid.label('etl_rowid'), error_type]).\
+            alias('c')
+        rejected = sql.select(
+            [classified.c.etl_rowid, classified.c.error_type]).\
+            where(classified.c.error_type.isnot(None))
+
+        # Most loads have no conflicts so the error handler is not touched.
+        if db.connection.execute(rejected.limit(1)).first() is None:
+            log.sys.info('Found conflicts: <0>.')
+            return
+
+        # Classification is materialized once for the insert and the delete.
+        name = config.parse_table_name('cf')
+        if db.engine.has_table(name) is True:
+            db.connection.execute(f'DROP TABLE {name}')
+        stmt = rejected.compile(**db.compargs)
+        db.connection.execute(f'CREATE TABLE {name} AS\n{stmt}')
+        try:
+            conflicts = sql.table(
+                name, sql.column('etl_rowid'), sql.column('error_type'))
+
+            eh = parser.parse_error_handler()
+            eh.prepare()
+
+            columns = {column.name: column for column in medium.columns}
+            columns['load_id'] = load_id
+            columns['error_type'] = conflicts.c.error_type
+            names = [column.name for column in eh.data.columns]
+            select = sql.select([columns[name] for name in names]).\
+                select_from(medium.join(
+                    conflicts, rowid == conflicts.c.etl_rowid))
+            insert = eh.data.insert().from_select(names, select)
+            result = db.connection.execute(insert)
+            log.count('error', result.rowcount)
+            log.sys.info(f'Found conflicts: <{result.rowcount}>.')
+
+            select = sql.select([conflicts.c.etl_rowid])
+            delete = medium.delete().where(rowid.in_(select))
+            result = db.connection.execute(delete)
+        finally:
+            db.connection.execute(f'DROP TABLE {name}')
+
+        log.sys.info(
+            f'Conflicts <{result.rowcount}> moved '\
+            f'to <{db.name}.{eh.schema}.{eh.name}>.')
+        pipeline.error_handler = eh
+        pipeline.with_error = True
+        pass
+
     def process_duplicates(self):
         pipeline = self.pipeline
 
@@ -166,7 +482,8 @@ class Medium(Table):
             delete = self.data.delete().\
                 where(sql.tuple_(*columns_medium).in_(select_output))
 
-            db.connection.execute(insert)
+            moved = db.connection.execute(insert)
+            log.count('error', moved.rowcount)
             db.connection.execute(delete)
 
             log.sys.info(
@@ -224,7 +541,8 @@ class Medium(Table):
             delete = self.data.delete().\
                 where(sql.tuple_(*columns_medium).in_(select_output))
 
-            db.connection.execute(insert)
+            moved = db.connection.execute(insert)
+            log.count('error', moved.rowcount)
             db.connection.execute(delete)
 
             log.sys.info(
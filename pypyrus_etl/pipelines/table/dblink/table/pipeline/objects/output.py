@@ -1,6 +1,8 @@
 import pypyrus_etl as etl
 import sqlalchemy as sql
 
+from datetime import timedelta
+
 from pypyrus_etl.objects.table import Table
 
 class Output(Table):
@@ -14,9 +16,7 @@ class Output(Table):
 
         log.sys.info(f'Load table <{db.name}.{self.schema}.{self.name}>.')
 
-        table = sql.Table(
-            tbname, db.metadata,
-            autoload=True, autoload_with=db.engine)
+        table = self.pipeline.cache.reflect(tbname, db)
 
         self.data = table
         log.sys.info('Table loaded.')
@@ -33,12 +33,15 @@ class Output(Table):
 
         columns = config.parse_columns()
         primary_key = config.parse_primary_key()
+        merge_key = config.parse_merge_key()
         foreign_keys = config.parse_foreign_keys()
         params = config.parse_params()
 
+        keys = [primary_key, merge_key] if merge_key is not None \
+            else [primary_key]
         table = sql.Table(
             tbname, db.metadata,
-            *columns, primary_key, *foreign_keys, **params)
+            *columns, *keys, *foreign_keys, **params)
         table.create(db.engine, checkfirst=True)
 
         self.data = table
@@ -50,16 +53,13 @@ class Output(Table):
 
         pipeline = self.pipeline
         log = pipeline.log
-        config = pipeline.config
-
-        parallel = config.data.get('parallel', False)
-        dop = config.data.get('dop', 'auto')
 
         log.sys.info(f'Delete all in <{db.name}.{self.schema}.{self.name}>.')
 
         delete = self.data.delete()
-        if parallel is True:
-            delete = etl.database.dml.parallel(delete, dop=dop)
+        hint = pipeline.profile.get_hint('delete')
+        if hint is not None:
+            delete = delete.prefix_with(hint, dialect='oracle')
 
         stmt = delete.compile(**db.compargs)
         log.sys.info(f'With query:\n\n{stmt}\n')
@@ -68,7 +68,21 @@ class Output(Table):
         log.sys.info('Data in table deleted.')
         pass
 
-    def insert(self):
+    def truncate(self):
+        """Remove all records from the table."""
+        db = self.database
+
+        log = self.pipeline.log
+
+        log.sys.info(
+            f'Truncate table <{db.name}.{self.schema}.{self.name}>.')
+        truncate = sql.text(f'TRUNCATE TABLE {self.name}').\
+            execution_options(autocommit=True)
+        db.connection.execute(truncate)
+        log.sys.info('Table truncated.')
+        pass
+
+    def insert(self, table=None, statement='insert', where=None):
         db = self.database
 
         pipeline = self.pipeline
@@ -76,28 +90,38 @@ class Output(Table):
         log = pipeline.log
         config = pipeline.config
 
-        parallel = config.data.get('parallel', False)
-        dop = config.data.get('dop', 'auto')
+        # Other table with the same columns can be loaded instead.
+        table = self.data if table is None else table
 
         log.sys.info(
             'Load data '\
             f'from <{db.name}.{medium.schema}.{medium.name}> '\
-            f'to <{db.name}.{self.schema}.{self.name}>.')
+            f'to <{db.name}.{self.schema}.{table.name}>.')
 
         output_columns = self.get_columns(only_names=True, insert=True)
         medium_columns = config.pick_medium_columns()
         load_id = sql.literal(log.load_id).label('load_id')
 
-        select = sql.select([*medium_columns, load_id])
-        insert = self.data.insert().\
-            from_select([*output_columns, 'load_id'], select)
-        if parallel is True:
-            insert = etl.database.dml.parallel(insert, dop=dop)
+        output_columns = [*output_columns, 'load_id']
+        medium_columns = [*medium_columns, load_id]
+        row_hash = self.get_row_hash()
+        if row_hash is not None:
+            output_columns.append('row_hash')
+            medium_columns.append(row_hash)
+
+        select = sql.select(medium_columns)
+        if where is not None:
+            select = select.where(where)
+        insert = table.insert().from_select(output_columns, select)
+        hint = pipeline.profile.get_hint(statement)
+        if hint is not None:
+            insert = insert.prefix_with(hint, dialect='oracle')
 
         stmt = insert.compile(**db.compargs)
         log.sys.info(f'With query:\n\n{stmt}\n')
 
-        db.connection.execute(insert)
+        result = db.connection.execute(insert)
+        log.count('loaded', result.rowcount)
         log.sys.info('Insert completed.')
         pass
 
@@ -109,9 +133,6 @@ class Output(Table):
         log = pipeline.log
         config = pipeline.config
 
-        parallel = config.data.get('parallel', False)
-        dop = config.data.get('dop', 'auto')
-
         log.sys.info(
             'Update data '\
             f'from <{db.name}.{medium.schema}.{medium.name}> '\
@@ -121,19 +142,37 @@ class Output(Table):
         update_id = sql.literal(log.load_id).label('update_id')
 
         table = self.data
-        using = sql.select([medium.data, load_id, update_id])
+        using = [medium.data, load_id, update_id]
         keys = config.data['update']['keys']
-        columns = config.data['update']['columns']
-        columns.append('update_id')
-
-        update = etl.database.dml.update(table, using, keys, columns)
-        if parallel is True:
-            update = etl.database.dml.parallel(update, dop=dop)
+        columns = [*config.data['update']['columns'], 'update_id']
+
+        # Last loaded record of the key is taken when the key repeats.
+        order = None
+        rowid = medium.get_rowid()
+        if rowid is not None:
+            using.append(rowid.label('etl_rowid'))
+            order = ['etl_rowid']
+
+        # Only rows with changed hash are updated.
+        compare = None
+        row_hash = self.get_row_hash()
+        if row_hash is not None:
+            using.append(row_hash)
+            columns.append('row_hash')
+            compare = ['row_hash']
+        using = sql.select(using)
+
+        update = etl.database.dml.update(
+            table, using, keys, columns, compare=compare, order=order)
+        hint = pipeline.profile.get_hint('update')
+        if hint is not None:
+            update = update.prefix_with(hint, dialect='oracle')
 
         stmt = update.compile(**db.compargs)
         log.sys.info(f'With query:\n\n{stmt}\n')
 
-        db.connection.execute(update)
+        result = db.connection.execute(update)
+        log.count('updated', result.rowcount)
         log.sys.info('Update completed.')
         pipeline.with_update = True
         pass
@@ -146,9 +185,6 @@ class Output(Table):
         log = pipeline.log
         config = pipeline.config
 
-        parallel = config.data.get('parallel', False)
-        dop = config.data.get('dop', 'auto')
-
         log.sys.info(
             'Merge data '\
             f'from <{db.name}.{medium.schema}.{medium.name}> '\
@@ -158,35 +194,598 @@ class Output(Table):
         update_id = sql.literal(log.load_id).label('update_id')
 
         table = self.data
-        using = sql.select([medium.data, load_id, update_id])
+        using = [medium.data, load_id, update_id]
         keys = config.data['merge']['keys']
-        updcols = config.data['merge']['columns']
-        updcols.append('update_id')
+        updcols = [*config.data['merge']['columns'], 'update_id']
+
+        # Upsert finds the matched rows only by the unique key.
+        if db.vendor in ['postgresql', 'sqlite', 'mysql']:
+            names = [pair[0] for pair in etl.database.dml.parse_pairs(keys)]
+            if self.is_unique(names) is False:
+                raise ValueError(
+                    f'Merge keys <{names}> are not unique '\
+                    f'in <{db.name}.{self.schema}.{self.name}>.')
         inscols = self.get_columns(only_names=True, insert=True, pair=True)
         inscols = [*inscols, 'load_id']
 
-        merge = etl.database.dml.merge(table, using, keys, updcols, inscols)
-        if parallel is True:
-            merge = etl.database.dml.parallel(merge, dop=dop)
+        # Last loaded record of the key is taken when the key repeats.
+        order = None
+        rowid = medium.get_rowid()
+        if rowid is not None:
+            using.append(rowid.label('etl_rowid'))
+            order = ['etl_rowid']
+
+        # Only rows with changed hash are updated.
+        compare = None
+        row_hash = self.get_row_hash()
+        if row_hash is not None:
+            using.append(row_hash)
+            updcols.append('row_hash')
+            inscols.append('row_hash')
+            compare = ['row_hash']
+        using = sql.select(using)
+
+        merge = etl.database.dml.merge(
+            table, using, keys, updcols, inscols, compare=compare,
+            order=order)
+        hint = pipeline.profile.get_hint('merge')
+        if hint is not None:
+            merge = merge.prefix_with(hint, dialect='oracle')
 
         stmt = merge.compile(**db.compargs)
         log.sys.info(f'With query:\n\n{stmt}\n')
 
-        db.connection.execute(merge)
+        result = db.connection.execute(merge)
+        log.count('merged', result.rowcount)
         log.sys.info('Merge completed.')
         pipeline.with_update = True
         pass
 
+    def is_unique(self, names):
+        """Check that the primary or unique key has exactly the columns."""
+        db = self.database
+        inspector = sql.inspect(db.engine)
+
+        keys = [inspector.get_pk_constraint(self.name)['constrained_columns']]
+        for key in inspector.get_unique_constraints(self.name):
+            keys.append(key['column_names'])
+        for index in inspector.get_indexes(self.name):
+            if index['unique'] is True:
+                keys.append(index['column_names'])
+
+        names = set(name.lower() for name in names)
+        for key in keys:
+            if set(column.lower() for column in key) == names:
+                return True
+        return False
+
+    def get_reload(self):
+        """
+        Get the method of the full reload. Deleted table is swapped with the
+        new one in PostgreSQL and truncated in other databases except SQLite.
+        Oracle is not swapped as its renames are committed one by one and
+        the table would be missing between them. Table with triggers or
+        views is truncated as triggers are not moved to the new table and
+        views stay bound to the previous one. Table referenced by the
+        foreign keys of other tables can only be deleted from.
+        """
+        db = self.database
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        delete = config.data.get('delete', False)
+        if delete is True:
+            return 'delete'
+        elif delete not in ['swap', 'truncate']:
+            return None
+        elif delete == 'swap' and db.vendor != 'postgresql':
+            log.sys.info(f'Table swap is not supported by <{db.vendor}>.')
+            delete = 'truncate'
+        elif delete == 'swap' and self.is_triggered() is True:
+            log.sys.info(f'Table <{self.name}> has triggers.')
+            delete = 'truncate'
+        elif delete == 'swap' and self.is_viewed() is True:
+            log.sys.info(f'Table <{self.name}> is used by views.')
+            delete = 'truncate'
+        if delete == 'truncate' and db.vendor == 'sqlite':
+            return 'delete'
+        if self.is_referenced() is True:
+            log.sys.info(f'Table <{self.name}> is referenced by other tables.')
+            return 'delete'
+        return delete
+
+    def is_referenced(self):
+        """Check that the foreign keys of other tables refer to the table."""
+        db = self.database
+        if db.vendor == 'oracle':
+            select = [
+                'SELECT COUNT(*)',
+                '  FROM user_constraints r',
+                '  JOIN user_constraints p',
+                '    ON p.owner = r.r_owner',
+                '   AND p.constraint_name = r.r_constraint_name',
+                " WHERE r.constraint_type = 'R'",
+                '   AND p.table_name = UPPER(:name)',
+                '   AND r.table_name <> p.table_name']
+        elif db.vendor == 'postgresql':
+            select = [
+                'SELECT COUNT(*)',
+                '  FROM pg_constraint',
+                " WHERE contype = 'f'",
+                '   AND confrelid = CAST(:name AS regclass)',
+                '   AND conrelid <> confrelid']
+        elif db.vendor == 'mysql':
+            select = [
+                'SELECT COUNT(*)',
+                '  FROM information_schema.referential_constraints',
+                ' WHERE constraint_schema = DATABASE()',
+                '   AND referenced_table_name = :name',
+                '   AND table_name <> referenced_table_name']
+        else:
+            return False
+        select = sql.text('\n'.join(select))
+        return db.connection.execute(select, name=self.name).scalar() > 0
+
+    def is_triggered(self):
+        """Check that the table has triggers of its own."""
+        db = self.database
+        if db.vendor == 'postgresql':
+            select = [
+                'SELECT COUNT(*)',
+                '  FROM pg_trigger',
+                ' WHERE tgrelid = CAST(:name AS regclass)',
+                '   AND NOT tgisinternal']
+        else:
+            return False
+        select = sql.text('\n'.join(select))
+        return db.connection.execute(select, name=self.name).scalar() > 0
+
+    def is_viewed(self):
+        """Check that the views of the database select from the table."""
+        db = self.database
+        if db.vendor == 'postgresql':
+            select = [
+                'SELECT COUNT(*)',
+                '  FROM pg_depend d',
+                '  JOIN pg_rewrite r ON r.oid = d.objid',
+                " WHERE d.classid = CAST('pg_rewrite' AS regclass)",
+                '   AND d.refobjid = CAST(:name AS regclass)',
+                '   AND r.ev_class <> d.refobjid']
+        else:
+            return False
+        select = sql.text('\n'.join(select))
+        return db.connection.execute(select, name=self.name).scalar() > 0
+
+    def get_grants(self):
+        """Get the privileges granted on the table to the other roles."""
+        db = self.database
+        if db.vendor == 'postgresql':
+            select = [
+                'SELECT grantee, privilege_type',
+                '  FROM information_schema.role_table_grants',
+                ' WHERE table_schema = current_schema()',
+                '   AND table_name = :name',
+                '   AND grantee <> current_user']
+        else:
+            return []
+        select = sql.text('\n'.join(select))
+        return db.connection.execute(select, name=self.name).fetchall()
+
+    def get_swap_name(self, name, suffix):
+        """Get the name of the object made for the swap."""
+        db = self.database
+        maxlen = 30 if db.vendor == 'oracle' else 63
+        return f'{name[:maxlen-len(suffix)-1]}_{suffix}'
+
+    def swap(self):
+        """
+        Reload the table by the swap. New table with the same parameters,
+        columns, constraints, indexes, comments and grants is loaded from
+        the medium and replaces the current one by the rename. Readers see
+        the previous data until the swap that is done in one transaction.
+        """
+        db = self.database
+        tbname = self.name
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        shadow_name = self.get_swap_name(tbname, 'swp')
+        old_name = self.get_swap_name(tbname, 'old')
+        log.sys.info(
+            f'Swap table <{db.name}.{self.schema}.{self.name}> '\
+            f'with <{db.name}.{self.schema}.{shadow_name}>.')
+
+        # Whole structure is reflected as the cache keeps only the columns.
+        metadata = sql.MetaData()
+        table = sql.Table(
+            tbname, metadata, autoload=True, autoload_with=db.engine)
+
+        # Objects of the new table get their own names for the time of the
+        # swap and take the names of the replaced objects after it.
+        renames = []
+        def rename(object):
+            name = object.name
+            if name is None or name.lower().startswith('sys_'):
+                return None
+            new = self.get_swap_name(name, 'swp')
+            renames.append((object, new, name))
+            return new
+
+        columns = [column.copy() for column in table.columns]
+        constraints = []
+        names = set()
+        for constraint in table.constraints:
+            # Reflected table has the empty key when there is no key.
+            if len(constraint.columns) == 0 \
+            and isinstance(constraint, sql.PrimaryKeyConstraint) is True:
+                continue
+            name = rename(constraint)
+            names.add(constraint.name)
+            if isinstance(constraint, sql.PrimaryKeyConstraint) is True:
+                constraint = sql.PrimaryKeyConstraint(
+                    *constraint.columns.keys(), name=name)
+            elif isinstance(constraint, sql.UniqueConstraint) is True:
+                constraint = sql.UniqueConstraint(
+                    *constraint.columns.keys(), name=name)
+            elif isinstance(constraint, sql.ForeignKeyConstraint) is True:
+                constraint = sql.ForeignKeyConstraint(
+                    constraint.column_keys,
+                    [element.column for element in constraint.elements],
+                    name=name)
+            elif isinstance(constraint, sql.CheckConstraint) is True:
+                constraint = sql.CheckConstraint(
+                    constraint.sqltext, name=name)
+            else:
+                continue
+            constraints.append(constraint)
+        # Table is made with the parameters of the configuration.
+        params = config.parse_params()
+        shadow = sql.Table(
+            shadow_name, metadata, *columns, *constraints,
+            comment=table.comment, **params)
+
+        # Indexes are built after the load as it is faster.
+        indexes = []
+        for index in table.indexes:
+            if index.name not in names:
+                columns = [column.name for column in index.columns]
+                indexes.append([rename(index), columns, index.unique])
+
+        for name in [shadow_name, old_name]:
+            if db.engine.has_table(name) is True:
+                self.drop_table(name)
+        shadow.create(db.connection)
+        try:
+            for grantee, privilege in self.get_grants():
+                grantee = grantee if grantee == 'PUBLIC' else f'"{grantee}"'
+                self.execute(
+                    f'GRANT {privilege} ON {shadow_name} TO {grantee}')
+            self.insert(table=shadow, statement='swap')
+            for name, columns, unique in indexes:
+                log.sys.info(f'Create index <{name}>.')
+                columns = [shadow.c[column] for column in columns]
+                index = sql.Index(name, *columns, unique=unique)
+                index.create(db.connection)
+        except:
+            self.drop_table(shadow_name)
+            raise
+
+        try:
+            with db.connection.begin():
+                self.execute(f'ALTER TABLE {tbname} RENAME TO {old_name}')
+                self.execute(f'ALTER TABLE {shadow_name} RENAME TO {tbname}')
+                self.drop_table(old_name)
+                for object, new, name in renames:
+                    if isinstance(object, sql.Index) is True:
+                        self.execute(f'ALTER INDEX {new} RENAME TO {name}')
+                    else:
+                        self.execute(
+                            f'ALTER TABLE {tbname} '\
+                            f'RENAME CONSTRAINT {new} TO {name}')
+        except:
+            # Swap is rolled back so the new table keeps its own name.
+            if db.engine.has_table(shadow_name) is True:
+                self.drop_table(shadow_name)
+            raise
+        self.pipeline.cache.forget('table', tbname, self.schema)
+        log.sys.info('Table swapped.')
+        pass
+
+    def get_partition_method(self):
+        """
+        Get the method of the partition load. Partitions are replaced in
+        Oracle and PostgreSQL, other databases use the usual load.
+        """
+        db = self.database
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        partition = config.parse_partition()
+        if partition is None or partition['method'] is None:
+            return None
+        elif db.vendor not in ['oracle', 'postgresql']:
+            log.sys.info(f'Partition load is not supported by <{db.vendor}>.')
+            return None
+        return partition['method']
+
+    def get_partitions(self):
+        """Get the bounds of the partitions covered by the medium records."""
+        db = self.database
+
+        pipeline = self.pipeline
+        config = pipeline.config
+
+        partition = config.parse_partition()
+        interval = partition['interval']
+        column = config.get_column(name=partition['column'], original=False)
+        column = pipeline.medium.data.c[column['name']]
+
+        if db.vendor == 'oracle':
+            unit = 'DD' if interval == 'day' else 'MM'
+            start = sql.func.trunc(column, unit)
+        else:
+            start = sql.func.date_trunc(interval, column)
+        select = sql.select([start.label('start')]).distinct()
+        starts = [row.start for row in db.connection.execute(select)]
+        if None in starts:
+            raise ValueError(f'Partition column <{column.name}> has nulls.')
+
+        partitions = []
+        for start in sorted(starts):
+            if interval == 'day':
+                end = start + timedelta(days=1)
+            else:
+                end = (start + timedelta(days=32)).replace(day=1)
+            partitions.append((start, end))
+        return partitions
+
+    def load_partitions(self):
+        """
+        Replace the partitions covered by the medium with its records. Every
+        partition is loaded by the own worker with the own connection.
+        """
+        pipeline = self.pipeline
+        log = pipeline.log
+        config = pipeline.config
+
+        method = self.get_partition_method()
+        workers = config.parse_partition()['workers']
+        partitions = self.get_partitions()
+        log.sys.info(
+            f'Load <{len(partitions)}> partitions by <{method}> '\
+            f'with <{workers}> workers.')
+
+        errors = []
+        def run(bounds):
+            start, end = bounds
+            try:
+                if method == 'exchange':
+                    self.exchange_partition(start, end)
+                else:
+                    self.truncate_partition(start, end)
+            except Exception as error:
+                log.sys.warning(
+                    f'Partition <{start:%Y-%m-%d}> failed: {error}')
+                errors.append((start, error))
+            pass
+
+        pipeline.run_workers(run, partitions, workers)
+
+        if len(errors) > 0:
+            errors.sort(key=lambda item: item[0])
+            starts = ', '.join(f'{start:%Y-%m-%d}' for start, _ in errors)
+            raise RuntimeError(
+                f'Partitions <{starts}> failed.') from errors[0][1]
+        log.sys.info('Partitions loaded.')
+        pass
+
+    def get_partition_filter(self, start, end):
+        """Get the filter of the medium records of the partition."""
+        config = self.pipeline.config
+        partition = config.parse_partition()
+        column = config.get_column(name=partition['column'], original=False)
+        column = self.pipeline.medium.data.c[column['name']]
+        start = sql.literal_column(f"DATE '{start:%Y-%m-%d}'")
+        end = sql.literal_column(f"DATE '{end:%Y-%m-%d}'")
+        return sql.and_(column >= start, column < end)
+
+    def get_partition_name(self, start, end):
+        """
+        Get the name of the existing PostgreSQL partition with the given
+        bounds. Bounds are compared in the type of the partition column.
+        """
+        db = self.database
+        config = self.pipeline.config
+
+        column = config.parse_partition()['column']
+        type = self.data.c[column].type.compile(dialect=db.engine.dialect)
+        bounds = [
+            f'quote_literal(CAST(CAST(:{name} AS DATE) AS {type}))'
+            for name in ['start', 'end']]
+        select = [
+            'SELECT c.relname',
+            '  FROM pg_inherits i',
+            '  JOIN pg_class c ON c.oid = i.inhrelid',
+            ' WHERE i.inhparent = CAST(:name AS regclass)',
+            '   AND pg_get_expr(c.relpartbound, c.oid) = '\
+                f"'FOR VALUES FROM (' || {bounds[0]} || ') "\
+                f"TO (' || {bounds[1]} || ')'"]
+        select = sql.text('\n'.join(select))
+        return db.connection.execute(
+            select, name=self.name, start=start, end=end).scalar()
+
+    def get_partition_table(self, name):
+        """Get the table object with the output columns by the name."""
+        columns = [sql.column(column.name) for column in self.data.columns]
+        return sql.table(sql.sql.quoted_name(name, quote=False), *columns)
+
+    def truncate_partition(self, start, end):
+        """Truncate the partition and load it with the direct insert."""
+        db = self.database
+        tbname = self.name
+
+        log = self.pipeline.log
+
+        where = self.get_partition_filter(start, end)
+        if db.vendor == 'oracle':
+            # Lock makes the interval partition if it does not exist.
+            partition = f"PARTITION FOR (DATE '{start:%Y-%m-%d}')"
+            self.execute(f'LOCK TABLE {tbname} {partition} IN SHARE MODE')
+            self.execute(
+                f'ALTER TABLE {tbname} TRUNCATE {partition} '\
+                'UPDATE GLOBAL INDEXES')
+            table = self.get_partition_table(f'{tbname} {partition}')
+            self.insert(table=table, statement='partition', where=where)
+        elif db.vendor == 'postgresql':
+            partition = self.get_partition_name(start, end)
+            with db.connection.begin():
+                if partition is None:
+                    partition = self.get_swap_name(tbname, f'p{start:%Y%m%d}')
+                    self.execute(
+                        f'CREATE TABLE {partition} '\
+                        f'PARTITION OF {tbname} '\
+                        f"FOR VALUES FROM ('{start:%Y-%m-%d}') "\
+                        f"TO ('{end:%Y-%m-%d}')")
+                else:
+                    self.execute(f'TRUNCATE TABLE {partition}')
+                table = self.get_partition_table(partition)
+                self.insert(table=table, statement='partition', where=where)
+        log.sys.info(f'Partition <{start:%Y-%m-%d}> truncated and loaded.')
+        pass
+
+    def exchange_partition(self, start, end):
+        """
+        Load the new table and exchange the partition with it. In
+        PostgreSQL the previous partition is detached and dropped and the
+        new table is attached instead.
+        """
+        db = self.database
+        tbname = self.name
+
+        log = self.pipeline.log
+        config = self.pipeline.config
+
+        exchange = self.get_swap_name(tbname, f'x{start:%Y%m%d}')
+        if db.engine.has_table(exchange) is True:
+            self.drop_table(exchange)
+
+        where = self.get_partition_filter(start, end)
+        table = self.get_partition_table(exchange)
+        if db.vendor == 'oracle':
+            partition = f"PARTITION FOR (DATE '{start:%Y-%m-%d}')"
+            self.execute(
+                f'CREATE TABLE {exchange} AS '\
+                f'SELECT * FROM {tbname} WHERE 1 = 0')
+            try:
+                self.insert(table=table, statement='swap', where=where)
+                # Lock makes the interval partition if it does not exist.
+                self.execute(f'LOCK TABLE {tbname} {partition} IN SHARE MODE')
+                self.execute(
+                    f'ALTER TABLE {tbname} EXCHANGE {partition} '\
+                    f'WITH TABLE {exchange} '\
+                    'WITHOUT VALIDATION UPDATE GLOBAL INDEXES')
+                self.execute(
+                    f'ALTER TABLE {tbname} MODIFY {partition} '\
+                    'REBUILD UNUSABLE LOCAL INDEXES')
+            finally:
+                # Table keeps the records of the previous partition now.
+                self.drop_table(exchange)
+        elif db.vendor == 'postgresql':
+            partition = self.get_partition_name(start, end)
+            column = config.parse_partition()['column']
+            self.execute(
+                f'CREATE TABLE {exchange} (LIKE {tbname} '\
+                'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            try:
+                self.insert(table=table, statement='swap', where=where)
+                # Check of the bounds lets the attach skip the scan.
+                self.execute(
+                    f'ALTER TABLE {exchange} ADD CHECK ('\
+                    f"{column} >= '{start:%Y-%m-%d}' AND "\
+                    f"{column} < '{end:%Y-%m-%d}')")
+                with db.connection.begin():
+                    if partition is not None:
+                        self.execute(
+                            f'ALTER TABLE {tbname} '\
+                            f'DETACH PARTITION {partition}')
+                        self.drop_table(partition)
+                    else:
+                        partition = self.get_swap_name(
+                            tbname, f'p{start:%Y%m%d}')
+                    self.execute(
+                        f'ALTER TABLE {exchange} RENAME TO {partition}')
+                    self.execute(
+                        f'ALTER TABLE {tbname} ATTACH PARTITION {partition} '\
+                        f"FOR VALUES FROM ('{start:%Y-%m-%d}') "\
+                        f"TO ('{end:%Y-%m-%d}')")
+            except:
+                if db.engine.has_table(exchange) is True:
+                    self.drop_table(exchange)
+                raise
+        log.sys.info(f'Partition <{start:%Y-%m-%d}> exchanged.')
+        pass
+
+    def drop_table(self, name):
+        """Drop the table used by the swap."""
+        db = self.database
+        log = self.pipeline.log
+        log.sys.info(f'Drop table <{db.name}.{self.schema}.{name}>.')
+        purge = ' PURGE' if db.vendor == 'oracle' else ''
+        self.execute(f'DROP TABLE {name}{purge}')
+        pass
+
+    def execute(self, code):
+        """Execute the DDL statement of the swap."""
+        db = self.database
+        log = self.pipeline.log
+        log.sys.info(f'With query:\n\n{code}\n')
+        code = sql.text(code).execution_options(autocommit=True)
+        db.connection.execute(code)
+        pass
+
     def prepare(self):
         db = self.database
         tbname = self.name
 
         if db.engine.has_table(tbname) is True:
             self.load()
+            # Table created before the hashed compare was enabled.
+            if self.pipeline.config.parse_row_hash() is not None:
+                if 'row_hash' not in self.data.c:
+                    self.add_row_hash()
         else:
             self.create()
         pass
 
+    def get_row_hash(self):
+        """Get the row hash expression over the medium columns."""
+        pipeline = self.pipeline
+        names = pipeline.config.parse_row_hash()
+        if names is not None:
+            table = pipeline.medium.data
+            columns = [table.c[name] for name in names]
+            return etl.database.func.row_hash(*columns).label('row_hash')
+
+    def add_row_hash(self):
+        """Add the hidden column for the row hash to the table."""
+        db = self.database
+        log = self.pipeline.log
+
+        log.sys.info(
+            'Add row hash column '\
+            f'to <{db.name}.{self.schema}.{self.name}>.')
+
+        column = sql.Column('row_hash', sql.String(32))
+        datatype = column.type.compile(dialect=db.engine.dialect)
+        db.connection.execute(
+            f'ALTER TABLE {self.name} ADD {column.name} {datatype}')
+        self.data.append_column(column)
+        self.pipeline.cache.forget('table', self.name, self.schema)
+        pass
+
     def get_columns(self, only_names=False, insert=False, pair=False):
         config = self.pipeline.config
         table = self.data
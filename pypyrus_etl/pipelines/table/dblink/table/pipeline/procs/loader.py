@@ -1,3 +1,4 @@
+import time
 import sqlalchemy as sql
 
 import pypyrus_etl as etl
@@ -12,6 +13,7 @@ class Loader(etl.Loader):
         output = self.pipeline.output
         medium = self.pipeline.medium
 
+        log = self.pipeline.log
         config = self.pipeline.config
 
         # Get necessary items from the configuration.
@@ -20,15 +22,32 @@ class Loader(etl.Loader):
         update = config.data.get('update')
         merge = config.data.get('merge')
 
-        if delete is True:
+        # Table is reloaded entirely by one of the methods.
+        reload = output.get_reload()
+        # Partitions covered by the medium are replaced entirely.
+        partition = output.get_partition_method()
+        if reload == 'delete':
             output.delete()
+        elif reload == 'truncate':
+            output.truncate()
         elif delete is False:
-            if duplicates is False:
-                medium.process_duplicates()
-            if len(output.data.primary_key) > 0:
-                medium.process_primary_key_duplicates()
+            start = time.perf_counter()
+            # Existing keys are expected by the merge and the update.
+            upsert = isinstance(merge, dict) or isinstance(update, dict)
+            # Records of the replaced partitions are checked only against
+            # each other.
+            medium.process_conflicts(
+                duplicates=duplicates is False,
+                primary_key=len(output.data.primary_key) > 0 \
+                    and upsert is False,
+                batch_only=partition is not None)
+            log.measure('conflicts', start)
 
-        if isinstance(merge, dict) is True:
+        if reload == 'swap':
+            output.swap()
+        elif partition is not None:
+            output.load_partitions()
+        elif isinstance(merge, dict) is True:
             output.merge()
         elif isinstance(update, dict) is True:
             output.update()
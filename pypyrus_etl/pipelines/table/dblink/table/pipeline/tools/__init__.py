@@ -1,3 +1,5 @@
 from .log import Log
 from .config import Config
 from .parser import Parser
+from .cache import Cache
+from .profile import Profile
@@ -0,0 +1,239 @@
+import os
+import time
+import pickle
+import sqlite3
+import sqlalchemy as sql
+
+class Cache():
+    """
+    That class represents the local cache of table metadata shared between
+    the runs of ETL processes and stored in the embedded SQLite database.
+    """
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+        config = pipeline.config.data.get('cache', False)
+        if config is True:
+            config = {}
+        if isinstance(config, dict) is True:
+            default = os.path.join(
+                os.path.expanduser('~'), '.pypyrus_etl', 'cache.db')
+            self.enabled = True
+            self.path = os.path.abspath(config.get('path', default))
+            # Maximum age of entry in seconds.
+            self.ttl = config.get('ttl', 604800)
+            # Maximum number of entries in the cache.
+            self.size = config.get('size', 1000)
+            self.prepare()
+        else:
+            self.enabled = False
+            self.path = None
+
+        # DDL stamps probed during the run for the entries being saved.
+        self.stamps = {}
+        pass
+
+    def connect(self):
+        """Open connection to the cache database."""
+        return sqlite3.connect(self.path, timeout=60)
+
+    def prepare(self):
+        """Create the cache database if it does not exist."""
+        folder = os.path.dirname(self.path)
+        os.makedirs(folder, exist_ok=True)
+
+        code = [
+            'CREATE TABLE IF NOT EXISTS entries (',
+            'kind TEXT NOT NULL, link TEXT NOT NULL,',
+            'schema TEXT NOT NULL, name TEXT NOT NULL,',
+            'stamp TEXT, created REAL NOT NULL, accessed REAL NOT NULL,',
+            'data BLOB NOT NULL,',
+            'PRIMARY KEY (kind, link, schema, name))']
+        code = '\n'.join(code)
+
+        connection = self.connect()
+        with connection:
+            connection.execute(code)
+        connection.close()
+        pass
+
+    def probe(self, name, schema, link=None):
+        """
+        Get the stamp of the last DDL applied to the table using the cheapest
+        catalog query available for the target DB.
+        """
+        database = self.pipeline.target
+
+        stamp = None
+        if database.vendor == 'oracle':
+            address = 'all_objects'
+            if link is not None:
+                address = f'{address}@{link}'
+
+            code = [
+                f'SELECT MAX(last_ddl_time) FROM {address}',
+                f'WHERE owner = \'{schema.upper()}\'',
+                f'AND object_name = \'{name.upper()}\'']
+            code = '\n'.join(code)
+
+            stamp = database.connection.execute(code).scalar()
+        elif database.vendor == 'postgresql' and link is None:
+            # There is no DDL time in PostgreSQL so the structure fingerprint
+            # from the catalog is used instead. Constraints are included as
+            # the primary key is cached too.
+            code = [
+                'SELECT c.oid || \':\' || md5(string_agg(',
+                'a.attname || a.atttypid || a.atttypmod, \',\'',
+                'ORDER BY a.attnum)) || \':\' || COALESCE((',
+                'SELECT md5(string_agg(',
+                'k.conname || k.contype || array_to_string(k.conkey, \' \'),',
+                '\',\' ORDER BY k.conname))',
+                'FROM pg_constraint k WHERE k.conrelid = c.oid), \'\')',
+                'FROM pg_class c',
+                'JOIN pg_namespace n ON n.oid = c.relnamespace',
+                'JOIN pg_attribute a ON a.attrelid = c.oid',
+                f'WHERE n.nspname = \'{schema.lower()}\'',
+                f'AND c.relname = \'{name.lower()}\'',
+                'AND a.attnum > 0 AND NOT a.attisdropped',
+                'GROUP BY c.oid']
+            code = '\n'.join(code)
+
+            stamp = database.connection.execute(code).scalar()
+
+        stamp = None if stamp is None else str(stamp)
+        return stamp
+
+    def load(self, kind, name, schema, link=None):
+        """
+        Get the entry from the cache if it is still valid according to its
+        age and the last DDL time of the table.
+        """
+        if self.enabled is True:
+            link = link or ''
+            key = (kind, link, schema, name)
+            stamp = self.stamps[key] = self.probe(name, schema, link or None)
+
+            now = time.time()
+            connection = self.connect()
+            with connection:
+                select = [
+                    'SELECT stamp, created, data FROM entries',
+                    'WHERE kind = ? AND link = ? AND schema = ? AND name = ?']
+                select = '\n'.join(select)
+                row = connection.execute(select, key).fetchone()
+
+                if row is not None:
+                    valid = True
+                    if now - row[1] > self.ttl:
+                        valid = False
+                    elif stamp is None or row[0] != stamp:
+                        valid = False
+
+                    if valid is True:
+                        update = [
+                            'UPDATE entries SET accessed = ?',
+                            'WHERE kind = ? AND link = ? '\
+                            'AND schema = ? AND name = ?']
+                        update = '\n'.join(update)
+                        connection.execute(update, (now, *key))
+                        data = pickle.loads(row[2])
+                    else:
+                        delete = [
+                            'DELETE FROM entries',
+                            'WHERE kind = ? AND link = ? '\
+                            'AND schema = ? AND name = ?']
+                        delete = '\n'.join(delete)
+                        connection.execute(delete, key)
+                        data = None
+                else:
+                    data = None
+            connection.close()
+            return data
+
+    def save(self, kind, name, schema, data, link=None):
+        """Put the entry to the cache and evict the old ones."""
+        if self.enabled is True:
+            link = link or ''
+            key = (kind, link, schema, name)
+            stamp = self.stamps.pop(key, None)
+            # Entries that can not be revalidated are not stored.
+            if stamp is not None:
+                now = time.time()
+                data = pickle.dumps(data)
+
+                connection = self.connect()
+                with connection:
+                    insert = [
+                        'INSERT OR REPLACE INTO entries',
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)']
+                    insert = '\n'.join(insert)
+                    connection.execute(insert, (*key, stamp, now, now, data))
+                    self.evict(connection, now)
+                connection.close()
+        pass
+
+    def forget(self, kind, name, schema, link=None):
+        """Remove the entry from the cache."""
+        if self.enabled is True:
+            link = link or ''
+            key = (kind, link, schema, name)
+
+            connection = self.connect()
+            with connection:
+                delete = [
+                    'DELETE FROM entries',
+                    'WHERE kind = ? AND link = ? AND schema = ? AND name = ?']
+                delete = '\n'.join(delete)
+                connection.execute(delete, key)
+            connection.close()
+        pass
+
+    def evict(self, connection, now):
+        """Remove expired entries and the least recently used ones."""
+        expired = 'DELETE FROM entries WHERE created < ?'
+        connection.execute(expired, (now - self.ttl,))
+
+        unused = [
+            'DELETE FROM entries WHERE rowid NOT IN (',
+            'SELECT rowid FROM entries ORDER BY accessed DESC LIMIT ?)']
+        unused = '\n'.join(unused)
+        connection.execute(unused, (self.size,))
+        pass
+
+    def reflect(self, name, database):
+        """
+        Get the table object described in the cache or reflect it from the
+        database and save its description to the cache.
+        """
+        schema = database.schema
+        data = self.load('table', name, schema)
+        if data is None:
+            table = sql.Table(
+                name, database.metadata,
+                autoload=True, autoload_with=database.engine)
+
+            columns = []
+            for column in table.columns:
+                columns.append([column.name, column.type, column.nullable])
+            primary_key = {
+                'name': table.primary_key.name,
+                'columns': [column.name for column in table.primary_key]}
+            data = {'columns': columns, 'primary_key': primary_key}
+            self.save('table', name, schema, data)
+        else:
+            # Table described in the cache replaces the one in the metadata.
+            if name in database.metadata.tables:
+                existing = database.metadata.tables[name]
+                database.metadata.remove(existing)
+
+            columns = []
+            for column_name, type, nullable in data['columns']:
+                column = sql.Column(column_name, type, nullable=nullable)
+                columns.append(column)
+
+            primary_key = data['primary_key']
+            primary_key = sql.PrimaryKeyConstraint(
+                *primary_key['columns'], name=primary_key['name'])
+
+            table = sql.Table(name, database.metadata, *columns, primary_key)
+        return table
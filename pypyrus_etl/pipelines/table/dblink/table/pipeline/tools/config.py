@@ -14,6 +14,8 @@ class Config():
     def __init__(self, pipeline, object=None):
         self.pipeline = pipeline
         self.data = self.parse_configurator(object)
+        # Index of source column descriptions collected during the run.
+        self.catalog = {}
         pass
 
     def parse_configurator(self, object):
@@ -48,14 +50,13 @@ class Config():
         Parse the columns description from the configuration data and transform
         it to the sqlalchemy column definition expression.
         """
-        query = self.data.get('query')
         columns = self.data.get('columns')
+        # Describe all source tables at once before going through columns.
+        self.parse_catalog()
         for column in columns:
             load = column.get('load', True)
             if load is True:
-                table = column.get('table', query.get('table'))
-                schema = column.get('schema', query.get('schema'))
-                link = column.get('link', query.get('link'))
+                table, schema, link = self.parse_column_source(column)
 
                 colargs = []
 
@@ -114,26 +115,105 @@ class Config():
 
                 yield sql.Column(*colargs, **colkwargs)
 
-    def parse_column_datatype(self, name, datatype, table, schema, link):
+    def parse_column_source(self, column):
         """
-        Define column datatype according to configuration or and DB information.
+        Define the table, schema and link of the column source according to
+        the query configuration including the joined tables.
+        """
+        query = self.data.get('query')
+        table = query.get('table')
+        schema = query.get('schema')
+        link = query.get('link')
+
+        # Column may come from one of the joined tables referred by its
+        # name or alias.
+        column_table = column.get('table')
+        if column_table is not None:
+            table = column_table
+            join = query.get('join') or []
+            for data in join:
+                if column_table in [data.get('table'), data.get('alias')]:
+                    table = data.get('table')
+                    schema = data.get('schema', schema)
+                    link = data.get('link', link)
+                    break
+
+        schema = column.get('schema', schema)
+        link = column.get('link', link)
+        return table, schema, link
+
+    def parse_catalog(self):
+        """
+        Describe the columns of the main query table and all joined tables
+        so the column definitions are parsed without extra round trips.
+        """
+        query = self.data.get('query')
+        if isinstance(query, dict) is True:
+            table = query.get('table')
+            schema = query.get('schema')
+            link = query.get('link')
+            self.describe_table(table, schema, link)
+
+            join = query.get('join')
+            if isinstance(join, list) is True:
+                for data in join:
+                    join_table = data.get('table')
+                    join_schema = data.get('schema', schema)
+                    join_link = data.get('link', link)
+                    self.describe_table(join_table, join_schema, join_link)
+        pass
+
+    def describe_table(self, table, schema, link):
+        """
+        Get the description of all table columns in one catalog query and
+        keep it in the catalog index for the rest of the run.
         """
         database = self.pipeline.target
 
-        if datatype is None:
-            if database.vendor == 'oracle':
-                table = table.upper()
-                schema = schema.upper()
-                name = name.upper()
+        table = table.upper()
+        schema = schema.upper()
+        key = (link, schema, table)
+        if key not in self.catalog:
+            cache = self.pipeline.cache
+            columns = cache.load('catalog', table, schema, link=link)
+            if columns is None and database.vendor == 'oracle':
+                address = 'all_tab_columns'
+                if link is not None:
+                    address = f'{address}@{link}'
 
                 code = [
-                    f'SELECT data_type FROM all_tab_columns@{link}',
+                    'SELECT column_name, data_type, data_length, '\
+                    'data_precision, data_scale',
+                    f'FROM {address}',
                     f'WHERE owner = \'{schema}\'',
                     f'AND table_name = \'{table}\'',
-                    f'AND column_name = \'{name}\'']
+                    'ORDER BY column_id']
                 code = '\n'.join(code)
 
-                datatype = database.connection.execute(code).scalar()
+                columns = {}
+                result = database.connection.execute(code)
+                for row in result:
+                    columns[row[0]] = {
+                        'type': row[1],
+                        'length': row[2],
+                        'precision': row[3],
+                        'scale': row[4]}
+                cache.save('catalog', table, schema, columns, link=link)
+            self.catalog[key] = columns or {}
+        return self.catalog[key]
+
+    def get_catalog_column(self, name, table, schema, link):
+        """Get the column description from the catalog index."""
+        columns = self.describe_table(table, schema, link)
+        return columns.get(name.upper(), {})
+
+    def parse_column_datatype(self, name, datatype, table, schema, link):
+        """
+        Define column datatype according to configuration or and DB information.
+        """
+        if datatype is None:
+            column = self.get_catalog_column(name, table, schema, link)
+            datatype = column.get('type')
 
         # Choose correct SQLAlchemy datatype class name.
         datatype = datatype.upper()
@@ -161,23 +241,9 @@ class Config():
         """
         Define column length according to configuration or and DB information.
         """
-        database = self.pipeline.target
-
         if length is None:
-            if database.vendor == 'oracle':
-                table = table.upper()
-                schema = schema.upper()
-                name = name.upper()
-
-                code = [
-                    f'SELECT data_length FROM all_tab_columns@{link}',
-                    f'WHERE owner = \'{schema}\'',
-                    f'AND table_name = \'{table}\'',
-                    f'AND column_name = \'{name}\'']
-                code = '\n'.join(code)
-
-                length = database.connection.execute(code).scalar()
-
+            column = self.get_catalog_column(name, table, schema, link)
+            length = column.get('length')
         return length
 
     def parse_column_precision(self, name, precision, table, schema, link):
@@ -185,46 +251,18 @@ class Config():
         Define column precision according to configuration or and DB
         information.
         """
-        database = self.pipeline.target
-
         if precision is None:
-            if database.vendor == 'oracle':
-                table = table.upper()
-                schema = schema.upper()
-                name = name.upper()
-
-                code = [
-                    f'SELECT data_precision FROM all_tab_columns@{link}',
-                    f'WHERE owner = \'{schema}\'',
-                    f'AND table_name = \'{table}\'',
-                    f'AND column_name = \'{name}\'']
-                code = '\n'.join(code)
-
-                precision = database.connection.execute(code).scalar()
-
+            column = self.get_catalog_column(name, table, schema, link)
+            precision = column.get('precision')
         return precision
 
     def parse_column_scale(self, name, scale, table, schema, link):
         """
         Define column scale according to configuration or and DB information.
         """
-        database = self.pipeline.target
-
         if scale is None:
-            if database.vendor == 'oracle':
-                table = table.upper()
-                schema = schema.upper()
-                name = name.upper()
-
-                code = [
-                    f'SELECT data_scale FROM all_tab_columns@{link}',
-                    f'WHERE owner = \'{schema}\'',
-                    f'AND table_name = \'{table}\'',
-                    f'AND column_name = \'{name}\'']
-                code = '\n'.join(code)
-
-                scale = database.connection.execute(code).scalar()
-
+            column = self.get_catalog_column(name, table, schema, link)
+            scale = column.get('scale')
         return scale
 
     def compile_column_datatype(self, datatype, length, precision, scale):
@@ -261,6 +299,27 @@ class Config():
             primary_key = sql.PrimaryKeyConstraint(*keys, name=name)
         return primary_key
 
+    def parse_merge_key(self):
+        """
+        Parse the keys of the merge from the configuration data and
+        transform it to the sqlalchemy unique key definition expression.
+        Upserts of PostgreSQL, SQLite and MySQL find the matched rows only by
+        the unique key. Key is not made when it is the primary key.
+        """
+        vendor = self.pipeline.target.vendor
+        merge = self.data.get('merge')
+        if isinstance(merge, dict) is True \
+        and vendor in ['postgresql', 'sqlite', 'mysql']:
+            keys = [
+                key if isinstance(key, str) is True else key[0]
+                for key in merge.get('keys', [])]
+            primary_key = self.data.get('primary_key', [])
+            if isinstance(primary_key, dict) is True:
+                primary_key = primary_key.get('keys', [])
+            if set(key.lower() for key in keys) \
+            != set(key.lower() for key in primary_key):
+                return sql.UniqueConstraint(*keys)
+
     def parse_foreign_keys(self):
         """
         Parse the foreign key description from the configuration data and
@@ -307,16 +366,70 @@ class Config():
                 compress = data['compress']
                 parameters['oracle_compress'] = compress
 
+        # Output is created partitioned by the range of the date column.
+        partition = self.parse_partition()
+        if partition is not None:
+            column = partition['column']
+            if vendor == 'oracle':
+                if partition['interval'] == 'day':
+                    interval = "NUMTODSINTERVAL(1, 'DAY')"
+                else:
+                    interval = "NUMTOYMINTERVAL(1, 'MONTH')"
+                parameters['info'] = {
+                    'oracle_partition_by': \
+                        f'RANGE ({column}) INTERVAL ({interval})\n'\
+                        "(PARTITION p0 VALUES LESS THAN (DATE '1900-01-01'))"}
+            elif vendor == 'postgresql':
+                parameters['postgresql_partition_by'] = f'RANGE ({column})'
+
         if self.data.get('parameters') is not None:
             other = data['parameters']
             if isinstance(other, dict) is True:
                 parameters.update(other)
         return parameters
 
-    def parse_query(self):
+    def parse_partition(self):
+        """
+        Parse the partition description from the configuration data. Output
+        table is partitioned by the range of the date column with one
+        partition per day or month. With the method the partitions covered
+        by the medium are replaced by the exchange or by the truncate. The
+        method is required in PostgreSQL as it makes the partitions there.
+        """
+        vendor = self.pipeline.target.vendor
+        partition = self.data.get('partition')
+        if isinstance(partition, str) is True:
+            partition = {'column': partition}
+        if isinstance(partition, dict) is True:
+            column = partition['column']
+            interval = partition.get('interval', 'day')
+            method = partition.get('method')
+            workers = partition.get('workers', 1)
+            if re.match(r'^\w+$', column) is None:
+                raise ValueError(f'Wrong partition column <{column}>.')
+            if interval not in ['day', 'month']:
+                raise ValueError(f'Wrong partition interval <{interval}>.')
+            if method not in [None, 'exchange', 'truncate']:
+                raise ValueError(f'Wrong partition method <{method}>.')
+            if method is None and vendor == 'postgresql':
+                raise ValueError(
+                    f'Partition method is required by <{vendor}>.')
+            if self.data.get('delete') == 'swap':
+                raise ValueError('Partitioned table cannot be swapped.')
+            for name in ['merge', 'update']:
+                if method is not None \
+                and isinstance(self.data.get(name), dict) is True:
+                    raise ValueError(
+                        f'Partition load cannot be used with <{name}>.')
+            return {
+                'column': column, 'interval': interval,
+                'method': method, 'workers': workers}
+
+    def parse_query(self, slice=None):
         """
         Parse the query described in the configuration data and transform it
-        to the ANSI SQL expression.
+        to the ANSI SQL expression. Slice filter limits the query to one of
+        the disjoint parts of the data.
         """
         query = self.data.get('query')
         if query is not None:
@@ -325,7 +438,7 @@ class Config():
             select = self.parse_select()
             from_ = self.parse_from()
             join = self.parse_join()
-            where = self.parse_where()
+            where = self.parse_where(slice=slice)
 
             for part in [select, from_, join, where]:
                 if part is not None:
@@ -386,6 +499,12 @@ class Config():
                         fields.append(field)
                 fields = ', '.join(fields)
                 code.append(fields)
+
+            # Watermark is kept in the medium to calculate the next one.
+            watermark = self.parse_watermark()
+            if watermark is not None:
+                field = '.'.join(watermark)
+                code[-1] += f', {field} AS etl_watermark'
             code = ' '.join(code)
             return code
 
@@ -483,7 +602,7 @@ class Config():
                 code = '\n'.join(code)
                 return code
 
-    def parse_where(self):
+    def parse_where(self, slice=None):
         """
         Parse all description related to the where part of the query from
         the configuration data and transform it to the SQL expression inside
@@ -493,7 +612,7 @@ class Config():
         column_filters = self.parse_column_filters()
         query_filters = self.parse_query_filters()
         code = []
-        for filter_ in [period, column_filters, query_filters]:
+        for filter_ in [period, column_filters, query_filters, slice]:
             if filter_ is not None:
                 if len(code) == 0:
                     code.append('WHERE 1 = 1')
@@ -528,46 +647,54 @@ class Config():
 
                 pointer = table or main_alias or main_table
                 column = column or using
-                filter_.extend(["AND", f"{pointer}.{column}", "BETWEEN"])
-
-                now = pipeline.run_timestamp
-                format = 'YYYY-MM-DD HH24:MI:SS'
-                if re.match(r'@Today', value) is not None:
-                    begin = now.replace(hour=0, minute=0, second=0)
-                    end = now.replace(hour=23, minute=59, second=59)
-                if re.match(r'@Month', value) is not None:
-                    begin = now.replace(day=1, hour=0, minute=0, second=0)
-                    end = (begin + timedelta(days=32)).\
-                        replace(day=1, hour=23, minute=59, second=59)\
-                        - timedelta(days=1)
-                elif re.match(r'@LastHour', value) is not None:
-                    last_hour = now - timedelta(hours=1)
-                    begin = last_hour.replace(minute=0, second=0)
-                    end = last_hour.replace(minute=59, second=59)
-                elif re.match(r'@LastDay', value) is not None:
-                    last_day = now - timedelta(days=1)
-                    begin = last_day.replace(hour=0, minute=0, second=0)
-                    end = last_day.replace(hour=23, minute=59, second=59)
-                elif re.match(r'@LastMonth', value) is not None:
-                    last_month = (now.replace(day=1) - timedelta(days=1))
-                    begin = last_month.\
-                        replace(day=1, hour=0, minute=0, second=0)
-                    end = last_month.\
-                        replace(hour=23, minute=59, second=59)
-
-                if starting is not None:
-                    if pipeline.first_ever is True:
-                        begin = datetime.fromisoformat(starting)
-
-                if utc is True:
-                    begin = begin.astimezone(tz=timezone.utc)
-                    end = end.astimezone(tz=timezone.utc)
-
-                filter_.extend([
-                    f"TO_DATE('{begin:%Y-%m-%d %H:%M:%S}', '{format}')", "AND",
-                    f"TO_DATE('{end:%Y-%m-%d %H:%M:%S}', '{format}')"])
-
-                filter_ = ' '.join(filter_)
+                # Watermark mode takes rows above the last committed mark.
+                if re.match(r'@Watermark', value) is not None:
+                    filter_ = self.parse_watermark_filter(
+                        pointer, column, starting)
+                    if filter_ is None:
+                        return None
+                else:
+                    filter_.extend(["AND", f"{pointer}.{column}", "BETWEEN"])
+
+                    now = pipeline.run_timestamp
+                    format = 'YYYY-MM-DD HH24:MI:SS'
+                    if re.match(r'@Today', value) is not None:
+                        begin = now.replace(hour=0, minute=0, second=0)
+                        end = now.replace(hour=23, minute=59, second=59)
+                    if re.match(r'@Month', value) is not None:
+                        begin = now.replace(day=1, hour=0, minute=0, second=0)
+                        end = (begin + timedelta(days=32)).\
+                            replace(day=1, hour=23, minute=59, second=59)\
+                            - timedelta(days=1)
+                    elif re.match(r'@LastHour', value) is not None:
+                        last_hour = now - timedelta(hours=1)
+                        begin = last_hour.replace(minute=0, second=0)
+                        end = last_hour.replace(minute=59, second=59)
+                    elif re.match(r'@LastDay', value) is not None:
+                        last_day = now - timedelta(days=1)
+                        begin = last_day.replace(hour=0, minute=0, second=0)
+                        end = last_day.replace(hour=23, minute=59, second=59)
+                    elif re.match(r'@LastMonth', value) is not None:
+                        last_month = (now.replace(day=1) - timedelta(days=1))
+                        begin = last_month.\
+                            replace(day=1, hour=0, minute=0, second=0)
+                        end = last_month.\
+                            replace(hour=23, minute=59, second=59)
+
+                    if starting is not None:
+                        if pipeline.first_ever is True:
+                            begin = datetime.fromisoformat(starting)
+
+                    if utc is True:
+                        begin = begin.astimezone(tz=timezone.utc)
+                        end = end.astimezone(tz=timezone.utc)
+
+                    filter_.extend([
+                        f"TO_DATE('{begin:%Y-%m-%d %H:%M:%S}', '{format}')",
+                        "AND",
+                        f"TO_DATE('{end:%Y-%m-%d %H:%M:%S}', '{format}')"])
+
+                    filter_ = ' '.join(filter_)
                 if searching is None:
                     return filter_
                 else:
@@ -603,6 +730,116 @@ class Config():
                     code = '\n'.join(code)
                     return code
 
+    def parse_watermark(self):
+        """
+        Get the pointer and the column of the watermark if the period is
+        described in the watermark mode.
+        """
+        query = self.data.get('query')
+        if isinstance(query, dict) is True:
+            period = query.get('period')
+            if isinstance(period, dict) is True:
+                value = period.get('value') or ''
+                if re.match(r'@Watermark', value) is not None:
+                    table = period.get('table')
+                    alias = query.get('alias')
+                    pointer = table or alias or query.get('table')
+                    column = period.get('column') or period.get('using')
+                    return pointer, column
+
+    def parse_watermark_filter(self, pointer, column, starting):
+        """
+        Transform the last committed watermark to the SQL filter. First ever
+        load starts from the starting value or takes all rows without it.
+        """
+        mark = self.pipeline.log.last_watermark
+        if mark is None:
+            mark = starting
+        if mark is None:
+            return None
+        value = self.compile_watermark(mark)
+        return f'AND {pointer}.{column} > {value}'
+
+    def compile_watermark(self, mark):
+        """Transform the watermark to the SQL literal."""
+        mark = str(mark)
+        if re.match(r'^-?\d+(\.\d+)?$', mark) is not None:
+            return mark
+        try:
+            moment = datetime.fromisoformat(mark)
+        except ValueError:
+            # Other values are compared as the strings.
+            mark = mark.replace("'", "''")
+            return f"'{mark}'"
+        return f"TIMESTAMP '{moment:%Y-%m-%d %H:%M:%S.%f}'"
+
+    def parse_slices(self):
+        """
+        Parse the slices description from the configuration data and
+        transform it to the list of SQL filters splitting the query into the
+        disjoint parts. Slices are made by hash or range of the key or given
+        explicitly as filters.
+        """
+        slices = self.data.get('slices')
+        if isinstance(slices, dict) is True:
+            query = self.data.get('query')
+            pointer = query.get('alias') or query.get('table')
+
+            type = slices.get('type', 'hash')
+            key = slices.get('key')
+            count = slices.get('count', 4)
+            if key is not None and '.' not in key:
+                key = f'{pointer}.{key}'
+
+            filters = []
+            if type == 'hash':
+                # Rows with null key have null hash so they go to first slice.
+                for i in range(count):
+                    filter_ = f'ORA_HASH({key}, {count-1}) = {i}'
+                    if i == 0:
+                        filter_ = f'{filter_} OR {key} IS NULL'
+                    filters.append(f'AND ({filter_})')
+            elif type == 'range':
+                filters = self.parse_slice_ranges(key, count)
+            elif type == 'filters':
+                for filter_ in slices.get('filters'):
+                    filters.append(f'AND ({filter_})')
+            else:
+                raise ValueError(f'Unknown slices type <{type}>.')
+            return filters
+
+    def parse_slice_ranges(self, key, count):
+        """
+        Split the numeric key into the ranges between its current minimum and
+        maximum values. First and last ranges are open so rows added after
+        the bounds were found are not lost.
+        """
+        db = self.pipeline.target
+
+        select = [f'SELECT MIN({key}), MAX({key})']
+        for part in [self.parse_from(), self.parse_join(), self.parse_where()]:
+            if part is not None and part != '':
+                select.append(part)
+        select = '\n'.join(select)
+
+        low, high = db.connection.execute(select).fetchone()
+        if low is None:
+            return ['AND 1 = 1']
+
+        bounds = [low + (high - low) * i // count for i in range(1, count)]
+        filters = []
+        for i in range(count):
+            filter_ = []
+            if i > 0:
+                filter_.append(f'{key} >= {bounds[i-1]}')
+            if i < count - 1:
+                filter_.append(f'{key} < {bounds[i]}')
+            filter_ = ' AND '.join(filter_) or '1 = 1'
+            if i == 0:
+                filter_ = f'{filter_} OR {key} IS NULL'
+            filters.append(f'AND ({filter_})')
+        return filters
+
     def parse_column_filters(self):
         """
         Parse all descriptions related to column filters from
@@ -783,8 +1020,32 @@ class Config():
                 'refcolumn': 'load_id'}
             self.data['columns'].append(update_id)
             self.data['foreign_keys'].append(update_id_fk)
+
+        # Hidden column with the hash of the updated columns.
+        if self.parse_row_hash() is not None:
+            row_hash = {
+                'name': 'row_hash', 'type': 'varchar', 'length': 32,
+                'new': True}
+            self.data['columns'].append(row_hash)
         pass
 
+    def parse_row_hash(self):
+        """
+        Get the names of the medium columns used for the row hash if the
+        merge or update is described with the hashed compare.
+        """
+        for type in ['merge', 'update']:
+            params = self.data.get(type)
+            if isinstance(params, dict) is True:
+                if params.get('hash', False) is True:
+                    names = []
+                    for column in params['columns']:
+                        if isinstance(column, list) is True:
+                            column = column[1]
+                        if column not in ['update_id', 'row_hash']:
+                            names.append(column.lower())
+                    return names
+
     def parse_oracle_parallel(self):
         parallel = self.data.get('parallel', True)
         if parallel is True:
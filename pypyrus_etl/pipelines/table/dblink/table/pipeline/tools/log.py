@@ -1,6 +1,20 @@
+import time
+import threading
 import pypyrus_logbook as logbook
 import sqlalchemy as sql
 
+from datetime import datetime
+
+from pypyrus_etl.nodes.database.func import sysdate
+
+from . import metrics
+from .writer import writer
+
+# Load ids allocated in advance by reserve() for every log table of the
+# process so the logs of all pipelines with the same table share them.
+reserved = {}
+reserved_lock = threading.Lock()
+
 class Log():
     """
     That class represents the log object of an ETL process for objects loaded
@@ -9,6 +23,14 @@ class Log():
     def __init__(self, pipeline, sys=None):
         self.pipeline = pipeline
         self.sys = sys or logbook.Log('pipeline')
+        self.table = None
+        self.load_id = None
+        self.status = None
+        self.counts = {}
+        # Counts are added by the worker threads too.
+        self.lock = threading.Lock()
+        # Durations of the stages in seconds.
+        self.timings = {}
         pass
 
     def prepare(self):
@@ -30,10 +52,94 @@ class Log():
             sql.Column('records_loaded', sql.Integer),
             sql.Column('records_updated', sql.Integer),
             sql.Column('records_error', sql.Integer),
+            sql.Column('records_merged', sql.Integer),
             sql.Column('status', sql.String(1)),
-            oracle_compress=True)
-        table.create(self.pipeline.target.engine, checkfirst=True)
+            sql.Column('watermark', sql.String(64)),
+            sql.Column('prepare_seconds', sql.Float),
+            sql.Column('extract_seconds', sql.Float),
+            sql.Column('transform_seconds', sql.Float),
+            sql.Column('conflicts_seconds', sql.Float),
+            sql.Column('load_seconds', sql.Float),
+            sql.Column('finalize_seconds', sql.Float),
+            sql.Column('extract_rate', sql.Float),
+            sql.Column('load_rate', sql.Float),
+            sql.Column('load_profile', sql.String(1000)),
+            oracle_compress=True, extend_existing=True)
+        if db.engine.has_table(tbname) is True:
+            self.upgrade(table)
+        else:
+            table.create(self.pipeline.target.engine)
         self.table = table
+        self.prepare_ids()
+        pass
+
+    def prepare_ids(self):
+        """
+        Prepare the source of load ids. Sequence is used in databases that
+        have them and the counter row in others. New source continues the ids
+        already stored in the log table.
+        """
+        db = self.pipeline.target
+        tbname = self.table.name
+
+        if db.vendor in ['oracle', 'postgresql']:
+            # Name is cut to the limit of the database as PostgreSQL cuts
+            # it silently and the sequence would not be found by its name.
+            maxlen = 30 if db.vendor == 'oracle' else 63
+            name = f'{tbname[:maxlen-4]}_seq'
+            self.sequence = sql.Sequence(name)
+            if db.engine.dialect.has_sequence(db.connection, name) is False:
+                start = self.calculate_last_id() + 1
+                sequence = sql.Sequence(name, start=start, minvalue=0)
+                try:
+                    sequence.create(db.engine, checkfirst=True)
+                except sql.exc.DatabaseError:
+                    # Sequence was created by the concurrent process.
+                    if db.engine.dialect.has_sequence(
+                        db.connection, name
+                    ) is False:
+                        raise
+        else:
+            self.sequence = None
+            self.counters = sql.Table(
+                'etl_counters', db.metadata,
+                sql.Column('name', sql.String(128), primary_key=True),
+                sql.Column('value', sql.Integer, nullable=False),
+                keep_existing=True)
+            try:
+                self.counters.create(db.engine, checkfirst=True)
+            except sql.exc.DatabaseError:
+                # Table was created by the concurrent process.
+                if db.engine.has_table('etl_counters') is False:
+                    raise
+
+            select = sql.select([self.counters.c.value]).\
+                where(self.counters.c.name == tbname)
+            if db.connection.execute(select).scalar() is None:
+                value = self.calculate_last_id()
+                insert = self.counters.insert().\
+                    values(name=tbname, value=value)
+                try:
+                    db.connection.execute(insert)
+                except sql.exc.IntegrityError:
+                    # Counter was added by the concurrent process.
+                    pass
+        pass
+
+    def upgrade(self, table):
+        """Add the columns missing in the log table made by older versions."""
+        db = self.pipeline.target
+
+        inspector = sql.inspect(db.engine)
+        existing = inspector.get_columns(table.name)
+        existing = [column['name'].lower() for column in existing]
+        for column in table.columns:
+            if column.name not in existing:
+                datatype = column.type.compile(dialect=db.engine.dialect)
+                alter = f'ALTER TABLE {table.name} '\
+                        f'ADD {column.name} {datatype}'
+                self.sys.info(f'Upgrade log table with query <{alter}>.')
+                db.connection.execute(alter)
         pass
 
     def open(self):
@@ -50,18 +156,25 @@ class Log():
         self.load_id = self.calculate_id()
         # Current status of the ETL process.
         self.status = 0
+        # Records processed by DML statements of the ETL process.
+        self.counts = {}
+        # Watermark committed by the last successful ETL process.
+        self.last_watermark = self.calculate_last_watermark()
+        self.watermark = None
 
         load_id = sql.literal(self.load_id).label('load_id')
         run_timestamp = pipeline.run_timestamp
         run_by = pipeline.run_by
         job_id = pipeline.job_id
-        start_timestamp = sql.func.sysdate()
+        start_timestamp = sysdate()
         status = sql.literal(self.status).label('status')
 
         insert = self.table.insert().values(
             load_id=load_id, run_timestamp=run_timestamp, run_by=run_by,
             job_id=job_id, start_timestamp=start_timestamp, status=status)
         target.connection.execute(insert)
+        # Record is tracked until it is closed.
+        writer.logs.add(self)
 
         self.sys.info(
             f'Source is <{source.__class__.__name__}> '\
@@ -80,65 +193,56 @@ class Log():
 
     def process_extract_finished(self):
         """Set status to 1 and count records found in the input table."""
-        db = self.pipeline.target
-
         self.status = 1
-        self.records_found = self.calculate_records_found()
+        self.records_found = self.get_records('found')
+        # Rows moved to the error handler later still count for the mark
+        # so they are not extracted again.
+        self.watermark = self.calculate_watermark()
 
-        load_id = self.load_id
-        status = sql.literal(self.status).label('status')
+        status = str(self.status)
         records_found = self.records_found
 
         self.sys.info(f'Extracted records <{records_found}>.')
-        update = self.table.update().\
-            where(self.table.c.load_id == load_id).\
-            values(status=status, records_found=records_found)
-        db.connection.execute(update)
+        self.write(status=status, records_found=records_found)
 
         self.sys.info('Extraction finished.')
         pass
 
     def process_transform_finished(self):
         """Set status to 2."""
-        db = self.pipeline.target
-
         self.status = 2
-
-        load_id = self.load_id
-        status = sql.literal(self.status).label('status')
-
-        update = self.table.update().\
-            where(self.table.c.load_id == load_id).\
-            values(status=status)
-        db.connection.execute(update)
+        self.write(status=str(self.status))
 
         self.sys.info('Transformation finished.')
         pass
 
     def process_load_finished(self):
         """Set status to 3 and count records loaded to output table."""
-        db = self.pipeline.target
-
         self.status = 3
-        self.records_loaded = self.calculate_records_loaded()
-        self.records_updated = self.calculate_records_updated()
-        self.records_error = self.calculate_records_error()
+        self.records_loaded = self.get_records('loaded')
+        self.records_updated = self.get_records('updated')
+        self.records_error = self.get_records('error')
+        self.records_merged = self.counts.get('merged')
 
-        load_id = self.load_id
-        status = sql.literal(self.status).label('status')
+        status = str(self.status)
         records_loaded = self.records_loaded
         records_updated = self.records_updated
         records_error = self.records_error
+        records_merged = self.records_merged
+        watermark = self.watermark
 
         self.sys.info(f'Loaded records <{records_loaded}>.')
         self.sys.info(f'Updated records <{records_updated or 0}>.')
         self.sys.info(f'Error records <{records_error or 0}>.')
-        update = self.table.update().\
-            where(self.table.c.load_id == load_id).\
-            values(
-                status=status, records_loaded=records_loaded,
-                records_updated=records_updated, records_error=records_error)
-        db.connection.execute(update)
+        if records_merged is not None:
+            self.sys.info(f'Merged records <{records_merged}>.')
+        if watermark is not None:
+            self.sys.info(f'Watermark <{watermark}>.')
+        # Watermark is committed together with the successful status only.
+        self.write(
+            status=status, records_loaded=records_loaded,
+            records_updated=records_updated, records_error=records_error,
+            records_merged=records_merged, watermark=watermark)
 
         self.sys.info('Loading finished.')
         pass
@@ -150,57 +254,265 @@ class Log():
         self.status = 4
 
         load_id = self.load_id
-        status = sql.literal(self.status).label('status')
+        status = str(self.status)
 
+        # Error status is written at once after all pending updates.
         update = self.table.update().\
             where(self.table.c.load_id == load_id).\
             values(status=status)
-        self.sys.critical()
+        try:
+            writer.flush()
+            db.connection.execute(update)
+        finally:
+            self.sys.critical()
+        pass
+
+    def process_exit(self):
+        """
+        Set status to 4 if the process is exiting while the ETL process was
+        not finished.
+        """
+        if self.status < 3:
+            self.status = 4
+            db = self.pipeline.target
+            status = str(self.status)
+            end_timestamp = datetime.now()
+            values = {'status': status, 'end_timestamp': end_timestamp}
+            writer.put(db, self.table, self.load_id, values)
+        writer.logs.discard(self)
         pass
 
     def close(self):
         """
         Close logging for current ETL process by updating end_timestamp and
-        status in the LOG.
+        status in the LOG. Pending updates are written before so the final
+        status is durable.
         """
         load_id = sql.literal(self.load_id).label('load_id')
-        end_timestamp = sql.func.sysdate()
-        status = sql.literal(self.status).label('status')
+        end_timestamp = sysdate()
+        status = str(self.status)
 
         update = self.table.update().\
             where(self.table.c.load_id == load_id).\
             values(end_timestamp=end_timestamp, status=status)
 
+        writer.flush()
         self.pipeline.target.connection.execute(update)
+        writer.logs.discard(self)
         pass
 
     def update_status(self, status=None):
         """Simple way to modify status for current ETL process."""
         if status is not None:
             self.status = status
+            self.write(status=str(self.status))
+        pass
 
-            load_id = sql.literal(self.load_id).label('load_id')
-            status = sql.literal(self.status).label('status')
+    def write(self, **values):
+        """
+        Write values to the record of current ETL process. Values go through
+        the background writer unless it is disabled in the configuration.
+        """
+        db = self.pipeline.target
+        config = self.pipeline.config
 
+        options = config.data.get('log') or {}
+        if options.get('async', True) is True:
+            writer.configure(options.get('interval'), options.get('size'))
+            writer.put(db, self.table, self.load_id, values)
+        else:
             update = self.table.update().\
-                where(self.table.c.load_id == load_id).\
-                values(status=status)
+                where(self.table.c.load_id == self.load_id).\
+                values(**values)
+            db.connection.execute(update)
+        pass
+
+    def measure(self, stage, start):
+        """
+        Record the duration of the stage started at the given moment of the
+        performance counter and the rows per second processed by it.
+        """
+        seconds = time.perf_counter() - start
+        self.timings[stage] = seconds
+        values = {f'{stage}_seconds': seconds}
+
+        rate = self.calculate_rate(stage)
+        if rate is not None:
+            values[f'{stage}_rate'] = rate
+            self.sys.info(
+                f'Stage <{stage}> took <{seconds:.3f}> seconds '\
+                f'with <{rate:.1f}> rows per second.')
+        else:
+            self.sys.info(f'Stage <{stage}> took <{seconds:.3f}> seconds.')
+
+        # Stages failed before the record was opened are not written.
+        if self.table is not None and self.load_id is not None:
+            self.write(**values)
+        pass
+
+    def calculate_rate(self, stage):
+        """
+        Get rows per second of the stage. Rows are the records found for the
+        extraction and the records loaded, updated or merged for the loading.
+        """
+        seconds = self.timings.get(stage)
+        if stage == 'extract':
+            kinds = ['found']
+        elif stage == 'load':
+            kinds = ['loaded', 'updated', 'merged']
+        else:
+            return None
+
+        records = [self.counts.get(kind) for kind in kinds]
+        records = [value for value in records if value is not None]
+        if len(records) == 0 or not seconds:
+            return None
+        return sum(records) / seconds
+
+    def get_metrics(self):
+        """Get the timings and the records of current ETL process."""
+        rates = {}
+        for stage in self.timings:
+            rate = self.calculate_rate(stage)
+            if rate is not None:
+                rates[stage] = rate
+        return {
+            'pipeline': self.pipeline.name,
+            'load_id': self.load_id,
+            'status': self.status,
+            'timestamp': time.time(),
+            'stages': dict(self.timings),
+            'rates': rates,
+            'records': dict(self.counts)}
+
+    def export(self):
+        """
+        Export metrics of current ETL process to the local files given in the
+        configuration. Prometheus text file is replaced on every run while
+        JSON lines are appended.
+        """
+        config = self.pipeline.config
 
-            self.pipeline.target.connection.execute(update)
+        options = config.data.get('metrics') or {}
+        prometheus = options.get('prometheus')
+        jsonl = options.get('jsonl')
+        if prometheus is None and jsonl is None:
+            return
+
+        values = self.get_metrics()
+        if prometheus is not None:
+            self.sys.info(f'Export metrics to <{prometheus}>.')
+            metrics.write_prometheus(prometheus, values)
+        if jsonl is not None:
+            self.sys.info(f'Export metrics to <{jsonl}>.')
+            metrics.write_jsonl(jsonl, values)
         pass
 
     def calculate_id(self):
-        """Calculate load id for current ETL process."""
+        """
+        Get load id for current ETL process. Ids reserved before are used
+        first.
+        """
+        key = self.get_reserved_key()
+        with reserved_lock:
+            ids = reserved.get(key)
+            if ids:
+                return ids.pop(0)
+        return self.allocate_ids(1)[0]
+
+    def reserve(self, number):
+        """
+        Allocate the block of load ids at once for the next ETL processes
+        logged to the same table in that process.
+        """
+        if self.table is None:
+            self.prepare()
+        ids = self.allocate_ids(number)
+        key = self.get_reserved_key()
+        with reserved_lock:
+            reserved.setdefault(key, []).extend(ids)
+        return ids
+
+    def get_reserved_key(self):
+        """Get the key of the reserved load ids of the log table."""
+        db = self.pipeline.target
+        return (str(db.engine.url), self.table.schema, self.table.name)
+
+    def allocate_ids(self, number):
+        """
+        Allocate unique load ids. Ids never repeat even for processes started
+        at the same time.
+        """
+        db = self.pipeline.target
+
+        if self.sequence is not None:
+            name = self.sequence.name
+            if db.vendor == 'oracle':
+                select = f'SELECT {name}.NEXTVAL FROM dual '\
+                         f'CONNECT BY LEVEL <= {number}'
+            elif db.vendor == 'postgresql':
+                select = f"SELECT nextval('{name}') "\
+                         f"FROM generate_series(1, {number})"
+            result = db.connection.execute(select)
+            return sorted(row[0] for row in result)
+        else:
+            # Counter row is locked by the update until the commit.
+            counters = self.counters
+            name = self.table.name
+            update = counters.update().\
+                where(counters.c.name == name).\
+                values(value=counters.c.value + number)
+            select = sql.select([counters.c.value]).\
+                where(counters.c.name == name)
+            with db.connection.begin():
+                db.connection.execute(update)
+                value = db.connection.execute(select).scalar()
+            return list(range(value - number + 1, value + 1))
+
+    def calculate_last_id(self):
+        """
+        Get the last id stored in the log table. It is -1 when table is
+        empty so the first ETL process has id 0.
+        """
         db = self.pipeline.target
 
-        # Select last known id form the log table.
         select = sql.select(
             [sql.func.max(self.table.c.load_id).label('load_id')])
         result = db.connection.execute(select).scalar()
-        # If no id was found in the log table then that is the first ETL
-        # process for and that load must have id 0.
-        load_id = 0 if result is None else result + 1
-        return load_id
+        return -1 if result is None else result
+
+    def count(self, kind, records):
+        """
+        Add the rowcount of the executed DML statement to the records of the
+        given kind. Unknown rowcount makes the whole number unknown.
+        """
+        with self.lock:
+            if kind not in self.counts:
+                self.counts[kind] = 0
+            if self.counts[kind] is not None:
+                if records is None or records < 0:
+                    self.counts[kind] = None
+                else:
+                    self.counts[kind] += records
+        pass
+
+    def get_records(self, kind):
+        """
+        Get the number of records of the given kind processed by this load.
+        Numbers are taken from the DML rowcounts. Tables are counted only in
+        the verification mode or when the rowcount is unknown.
+        """
+        verify = self.pipeline.config.data.get('verify', False)
+        counted = self.counts.get(kind)
+        if verify is True or (kind in self.counts and counted is None):
+            calculate = getattr(self, f'calculate_records_{kind}')
+            result = calculate()
+            if verify is True and counted is not None and counted != result:
+                self.sys.warning(
+                    f'Records {kind} <{result}> differ '\
+                    f'from rowcount <{counted}>.')
+            return result
+        return counted
 
     def calculate_records_found(self):
         """Count the records found in input table."""
@@ -247,3 +559,33 @@ class Log():
                 where(table.c.load_id == load_id)
             result = db.connection.execute(count).scalar()
             return result
+
+    def calculate_last_watermark(self):
+        """Get the watermark of the last successful ETL process."""
+        db = self.pipeline.target
+        table = self.table
+
+        select = sql.select([table.c.watermark]).\
+            where(table.c.status == '3').\
+            where(table.c.watermark.isnot(None)).\
+            order_by(table.c.load_id.desc()).\
+            limit(1)
+        result = db.connection.execute(select).scalar()
+        return result
+
+    def calculate_watermark(self):
+        """
+        Calculate the watermark of the data extracted on this load before
+        the conflicts are processed. Previous watermark is kept when no data
+        was extracted.
+        """
+        pipeline = self.pipeline
+        watermark = pipeline.config.parse_watermark()
+        if watermark is not None:
+            db = pipeline.target
+            table = pipeline.medium.data
+            select = sql.select([sql.func.max(table.c.etl_watermark)])
+            result = db.connection.execute(select).scalar()
+            if result is None:
+                return self.last_watermark
+            return str(result)
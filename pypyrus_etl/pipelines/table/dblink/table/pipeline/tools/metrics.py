@@ -0,0 +1,74 @@
+import os
+import json
+import tempfile
+import threading
+
+# Lines of different pipelines are appended one by one.
+lock = threading.Lock()
+
+def escape(value):
+    """Escape the label value for the Prometheus text format."""
+    value = str(value).replace('\\', '\\\\')
+    value = value.replace('"', '\\"').replace('\n', '\\n')
+    return value
+
+def write_prometheus(path, metrics):
+    """
+    Write metrics of the ETL process to the file in the Prometheus text
+    format read by the textfile collector of node-exporter. File is written
+    to the temporary one first and replaced at once so collector never reads
+    it half written. Folder path gets one file per pipeline.
+    """
+    name = metrics['pipeline']
+    if os.path.isdir(path) is True:
+        path = os.path.join(path, f'etl_{name}.prom')
+    labels = f'pipeline="{escape(name)}"'
+
+    lines = []
+    def add(metric, kind, help, values):
+        lines.append(f'# HELP {metric} {help}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for label, value in values:
+            if value is not None:
+                lines.append(f'{metric}{{{labels}{label}}} {value}')
+
+    add('etl_load_id', 'gauge', 'Id of the last ETL process.',
+        [('', metrics['load_id'])])
+    add('etl_status', 'gauge', 'Status of the last ETL process.',
+        [('', metrics['status'])])
+    add('etl_last_run_timestamp_seconds', 'gauge',
+        'Time when the last ETL process finished.',
+        [('', metrics['timestamp'])])
+    add('etl_stage_duration_seconds', 'gauge',
+        'Duration of the ETL process stage.',
+        [(f',stage="{escape(stage)}"', seconds)
+         for stage, seconds in metrics['stages'].items()])
+    add('etl_stage_rows_per_second', 'gauge',
+        'Rows processed per second by the ETL process stage.',
+        [(f',stage="{escape(stage)}"', rate)
+         for stage, rate in metrics['rates'].items()])
+    add('etl_records', 'gauge',
+        'Records processed by the ETL process.',
+        [(f',kind="{escape(kind)}"', records)
+         for kind, records in metrics['records'].items()])
+
+    folder = os.path.dirname(os.path.abspath(path))
+    descriptor, temp = tempfile.mkstemp(
+        prefix='.etl_', suffix='.tmp', dir=folder)
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.chmod(temp, 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+    pass
+
+def write_jsonl(path, metrics):
+    """Append metrics of the ETL process to the file as one JSON line."""
+    line = json.dumps(metrics, default=str)
+    with lock:
+        with open(path, 'a') as file:
+            file.write(line + '\n')
+    pass
@@ -0,0 +1,186 @@
+import re
+import json
+import threading
+import sqlalchemy as sql
+
+class Profile():
+    """
+    That class represents the load profile of an ETL process. Profile is
+    the set of session settings applied to the target database during the
+    writing stages and the hints added to the writing statements.
+    """
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        # Values of the session settings before they were applied are kept
+        # for every thread as each of them has its own connection.
+        self.local = threading.local()
+        pass
+
+    @property
+    def data(self):
+        """Get the profile description from the configuration."""
+        return self.pipeline.config.data.get('load_profile') or {}
+
+    def get_dop(self):
+        """Get the degree of parallelism of the writing statements."""
+        config = self.pipeline.config
+
+        parallel = self.data.get('parallel')
+        if parallel is None and config.data.get('parallel', False) is True:
+            parallel = config.data.get('dop', 'auto')
+        if parallel is True:
+            parallel = 'auto'
+        return parallel or None
+
+    def get_settings(self):
+        """
+        Get the session settings for the target database. Settings may be
+        grouped by the database vendor. Parallel DML is enabled in Oracle
+        together with the parallel hint.
+        """
+        db = self.pipeline.target
+
+        if db.vendor not in ['oracle', 'postgresql', 'mysql']:
+            return {}
+
+        settings = {}
+        for name, value in (self.data.get('session') or {}).items():
+            if isinstance(value, dict) is True:
+                if name == db.vendor:
+                    settings.update(value)
+            else:
+                settings[name] = value
+        for name in list(settings):
+            if re.match(r'^\w+$', name) is None:
+                raise ValueError(f'Wrong session setting <{name}>.')
+            settings[name.lower()] = settings.pop(name)
+        if db.vendor == 'oracle' and self.get_dop() is not None:
+            settings['parallel_dml'] = True
+        return settings
+
+    def get_hint(self, statement):
+        """
+        Get the hint for the writing statement of the given type. Hints are
+        used in Oracle only. Direct path is used by inserts and merges but
+        not by the concurrent slices as it locks the whole table. Inserts
+        to the single partitions lock only the partition.
+        """
+        db = self.pipeline.target
+
+        if db.vendor == 'oracle':
+            hints = []
+            append = self.data.get('append', False)
+            if append is True \
+            and statement in ['insert', 'merge', 'partition']:
+                hints.append('APPEND')
+            dop = self.get_dop()
+            if dop is not None:
+                hints.append(f'PARALLEL({dop})')
+            if len(hints) > 0:
+                return f'/*+ {" ".join(hints)} */'
+
+    def is_nologging(self):
+        """Check that staging writes should skip the redo."""
+        db = self.pipeline.target
+        nologging = self.data.get('nologging', False)
+        return nologging is True and db.vendor == 'oracle'
+
+    def describe(self):
+        """Get the effective profile as the JSON text."""
+        description = {
+            'session': self.get_settings(),
+            'hints': {
+                statement: self.get_hint(statement)
+                for statement in ['insert', 'update', 'merge', 'delete']
+                if self.get_hint(statement) is not None},
+            'nologging': self.is_nologging()}
+        if len(description['session']) == 0 \
+        and len(description['hints']) == 0 \
+        and description['nologging'] is False:
+            return None
+        return json.dumps(description, default=str)
+
+    def compile_value(self, value):
+        """
+        Transform the setting value to the SQL literal. Oracle keywords and
+        numbers are left as they are, other strings are quoted.
+        """
+        db = self.pipeline.target
+        if isinstance(value, bool) is True:
+            return 'TRUE' if value is True else 'FALSE'
+        elif isinstance(value, (int, float)) is True:
+            return str(value)
+        value = str(value)
+        if db.vendor == 'oracle' and re.match(r'^[\w-]+$', value) is not None:
+            return value
+        value = value.replace("'", "''")
+        return f"'{value}'"
+
+    def execute(self, code):
+        """Execute the session statement committed at once."""
+        db = self.pipeline.target
+        log = self.pipeline.log
+
+        log.sys.info(f'Session setting <{code}>.')
+        code = sql.text(code).execution_options(autocommit=True)
+        db.connection.execute(code)
+        pass
+
+    def get_previous(self, name):
+        """Get the current value of the Oracle session setting."""
+        db = self.pipeline.target
+        select = sql.text('SELECT value FROM v$parameter WHERE name = :name')
+        try:
+            return db.connection.execute(select, name=name).scalar()
+        except sql.exc.DBAPIError:
+            return None
+
+    def apply(self):
+        """Apply the session settings to the connection of current thread."""
+        db = self.pipeline.target
+
+        previous = self.local.previous = {}
+        for name, value in self.get_settings().items():
+            if db.vendor == 'oracle':
+                if name == 'parallel_dml':
+                    state = 'ENABLE' if value is True else 'DISABLE'
+                    self.execute(f'ALTER SESSION {state} PARALLEL DML')
+                else:
+                    previous[name] = self.get_previous(name)
+                    value = self.compile_value(value)
+                    self.execute(f'ALTER SESSION SET {name} = {value}')
+            elif db.vendor == 'postgresql':
+                value = self.compile_value(value)
+                self.execute(f'SET {name} = {value}')
+            elif db.vendor == 'mysql':
+                value = self.compile_value(value)
+                self.execute(f'SET SESSION {name} = {value}')
+        pass
+
+    def reset(self):
+        """
+        Return the session settings of the connection of current thread to
+        the previous values. Oracle settings are returned only when their
+        values could be read before.
+        """
+        db = self.pipeline.target
+        log = self.pipeline.log
+
+        previous = getattr(self.local, 'previous', {})
+        for name in self.get_settings():
+            try:
+                if db.vendor == 'oracle':
+                    if name == 'parallel_dml':
+                        self.execute('ALTER SESSION DISABLE PARALLEL DML')
+                    elif previous.get(name) is not None:
+                        value = self.compile_value(previous[name])
+                        self.execute(f'ALTER SESSION SET {name} = {value}')
+                    else:
+                        log.sys.info(f'Setting <{name}> is not reset.')
+                elif db.vendor == 'postgresql':
+                    self.execute(f'RESET {name}')
+                elif db.vendor == 'mysql':
+                    self.execute(f'SET SESSION {name} = DEFAULT')
+            except Exception:
+                log.sys.warning()
+        pass
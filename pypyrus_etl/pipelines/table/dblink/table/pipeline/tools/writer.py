@@ -0,0 +1,139 @@
+import atexit
+import threading
+import sqlalchemy as sql
+
+class Writer():
+    """
+    That class represents the writer of the log records shared by all
+    pipelines of the process. Updates of the same record are merged while
+    they wait and are written by the background thread in batches. Queue is
+    bounded so pipelines wait when the writer does not keep up.
+    """
+    def __init__(self, interval=1.0, size=1000):
+        self.interval = interval
+        self.size = size
+        self.configured = False
+
+        # Pending values by the database, the table and the load id.
+        self.pending = {}
+        self.condition = threading.Condition()
+        # Flushes go one by one so older values never overwrite newer ones.
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+        self.error = None
+
+        # Logs of the ETL processes that are not closed yet.
+        self.logs = set()
+        pass
+
+    def configure(self, interval=None, size=None):
+        """
+        Set the parameters of the writer. Writer is shared by the process so
+        only the first configuration is applied.
+        """
+        with self.condition:
+            if self.configured is False:
+                self.interval = interval or self.interval
+                self.size = size or self.size
+                self.configured = True
+        pass
+
+    def start(self):
+        """Start the background thread if it is not running."""
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name='log-writer', daemon=True)
+                self.thread.start()
+        pass
+
+    def run(self):
+        """Flush pending updates by the interval until the stop."""
+        while True:
+            with self.condition:
+                if self.stopped is False and len(self.pending) < self.size:
+                    self.condition.wait(self.interval)
+                if self.stopped is True:
+                    break
+            try:
+                self.flush()
+            except Exception as error:
+                # Updates are kept in pending and tried again.
+                self.error = error
+        pass
+
+    def put(self, database, table, load_id, values):
+        """Add values of the log record to be written."""
+        self.start()
+        key = (database, table, load_id)
+        with self.condition:
+            while key not in self.pending and len(self.pending) >= self.size:
+                if self.stopped is True:
+                    break
+                self.condition.notify_all()
+                self.condition.wait()
+            self.pending.setdefault(key, {}).update(values)
+            if len(self.pending) >= self.size:
+                self.condition.notify_all()
+        # Nothing is written in background after the stop.
+        if self.stopped is True:
+            self.flush()
+        pass
+
+    def flush(self):
+        """
+        Write all pending updates now. Updates with the same columns in the
+        same table are executed as one batch.
+        """
+        with self.lock:
+            with self.condition:
+                pending = self.pending
+                self.pending = {}
+                self.condition.notify_all()
+            if len(pending) > 0:
+                self.write(pending)
+        pass
+
+    def write(self, pending):
+        """Execute the batches of pending updates."""
+        batches = {}
+        for (database, table, load_id), values in pending.items():
+            key = (database, table, tuple(sorted(values)))
+            params = {'log_load_id': load_id, **values}
+            batches.setdefault(key, []).append(params)
+
+        try:
+            for (database, table, columns), params in batches.items():
+                update = table.update().\
+                    where(table.c.load_id == sql.bindparam('log_load_id'))
+                try:
+                    database.connection.execute(update, params)
+                finally:
+                    database.release()
+        except Exception:
+            # Newer values put during the flush are kept over older ones.
+            with self.condition:
+                for key, values in pending.items():
+                    values.update(self.pending.get(key, {}))
+                    self.pending[key] = values
+            raise
+        pass
+
+    def stop(self):
+        """
+        Write all pending updates and stop the background thread. Records
+        of ETL processes that were not finished get the error status.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        for log in list(self.logs):
+            log.process_exit()
+        self.flush()
+        pass
+
+writer = Writer()
+atexit.register(writer.stop)
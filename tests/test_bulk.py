@@ -0,0 +1,37 @@
+import datetime
+
+from pypyrus_etl.nodes.database import bulk
+
+def test_encode_null():
+    assert bulk.encode_value(None) == '\\N'
+
+def test_encode_bool():
+    assert bulk.encode_value(True) == 't'
+    assert bulk.encode_value(False) == 'f'
+
+def test_encode_dates():
+    value = datetime.datetime(2020, 1, 2, 3, 4, 5, 6)
+    assert bulk.encode_value(value) == '2020-01-02T03:04:05.000006'
+    assert bulk.encode_value(value.date()) == '2020-01-02'
+
+def test_encode_numbers():
+    assert bulk.encode_value(0) == '0'
+    assert bulk.encode_value(1.5) == '1.5'
+
+def test_encode_bytes():
+    # Escaped backslash leaves the hex input of bytea after COPY decoding.
+    assert bulk.encode_value(b'\x00\xff') == '\\\\x00ff'
+    assert bulk.encode_value(bytearray(b'a')) == '\\\\x61'
+
+def test_encode_special_characters():
+    value = 'a\\b\tc\nd\re'
+    assert bulk.encode_value(value) == 'a\\\\b\\tc\\nd\\re'
+
+def test_encode_null_marker_text():
+    # Text equal to the null marker stays the text.
+    assert bulk.encode_value('\\N') == '\\\\N'
+
+def test_encode_rows():
+    rows = [{'id': 1, 'name': 'a\tb'}, {'id': 2}]
+    buffer = bulk.encode_rows(rows, ['id', 'name'])
+    assert buffer.read() == '1\ta\\tb\n2\t\\N\n'
@@ -0,0 +1,181 @@
+import pytest
+import sqlalchemy as sql
+
+from sqlalchemy.exc import CompileError
+from sqlalchemy.dialects import oracle, postgresql, mysql, sqlite, mssql
+
+from pypyrus_etl.nodes.database import dml
+
+metadata = sql.MetaData()
+output = sql.Table(
+    'output', metadata,
+    sql.Column('id', sql.Integer, primary_key=True),
+    sql.Column('name', sql.String(20)),
+    sql.Column('row_hash', sql.String(32)),
+    sql.Column('load_id', sql.Integer),
+    sql.Column('update_id', sql.Integer))
+medium = sql.Table(
+    'medium', metadata,
+    sql.Column('id', sql.Integer),
+    sql.Column('title', sql.String(20)),
+    sql.Column('row_hash', sql.String(32)))
+
+def get_using(load_id=5):
+    load_id = sql.literal(load_id)
+    return sql.select(
+        [medium, load_id.label('load_id'), load_id.label('update_id')])
+
+def get_merge(compare=['row_hash'], load_id=5):
+    return dml.merge(
+        output, get_using(load_id), ['id'],
+        [['name', 'title'], 'update_id', 'row_hash'],
+        ['id', ['name', 'title'], 'load_id', 'row_hash'],
+        compare=compare)
+
+def get_update(compare=['row_hash'], load_id=5):
+    return dml.update(
+        output, get_using(load_id), ['id'],
+        [['name', 'title'], 'update_id', 'row_hash'],
+        compare=compare)
+
+def render(statement, dialect):
+    return str(statement.compile(dialect=dialect.dialect()))
+
+def test_merge_oracle():
+    code = render(get_merge(), oracle)
+    assert code.startswith('MERGE INTO output t\nUSING (SELECT')
+    assert 'ON (t.id = u.id)' in code
+    assert 'WHEN MATCHED THEN UPDATE SET t.name = u.title, '\
+        't.update_id = u.update_id, t.row_hash = u.row_hash' in code
+    assert 'WHERE (t.row_hash <> u.row_hash OR t.row_hash IS NULL)' in code
+    assert 'WHEN NOT MATCHED THEN INSERT '\
+        '(t.id, t.name, t.load_id, t.row_hash) '\
+        'VALUES (u.id, u.title, u.load_id, u.row_hash)' in code
+
+def test_update_oracle():
+    code = render(get_update(), oracle)
+    assert code.startswith('MERGE INTO output t')
+    assert 'WHEN MATCHED THEN UPDATE SET' in code
+    assert 'WHEN NOT MATCHED' not in code
+
+@pytest.mark.parametrize('dialect', [postgresql, sqlite])
+def test_merge_on_conflict(dialect):
+    code = render(get_merge(), dialect)
+    assert code.startswith(
+        'INSERT INTO output AS t (id, name, load_id, row_hash)\n'\
+        'SELECT u.id, u.title, u.load_id, u.row_hash\n')
+    # Filter keeps SQLite from reading ON CONFLICT as the join condition.
+    assert 'u\nWHERE 1 = 1\nON CONFLICT (id)\n' in code
+    assert 'DO UPDATE SET name = excluded.name, update_id = 5, '\
+        'row_hash = excluded.row_hash\n' in code
+    assert code.endswith(
+        'WHERE (t.row_hash <> excluded.row_hash OR t.row_hash IS NULL)')
+
+@pytest.mark.parametrize('dialect', [postgresql, sqlite])
+def test_merge_on_conflict_without_compare(dialect):
+    code = render(get_merge(compare=None), dialect)
+    assert code.endswith('row_hash = excluded.row_hash')
+
+@pytest.mark.parametrize('dialect', [postgresql, sqlite])
+def test_update_from(dialect):
+    code = render(get_update(), dialect)
+    assert code.startswith(
+        'UPDATE output AS t\n'\
+        'SET name = u.title, update_id = u.update_id, '\
+        'row_hash = u.row_hash\n'\
+        'FROM (SELECT')
+    assert 'WHERE t.id = u.id\n'\
+        'AND ((t.row_hash <> u.row_hash OR t.row_hash IS NULL))' in code
+
+def test_merge_mysql():
+    code = render(get_merge(), mysql)
+    assert code.startswith(
+        'INSERT INTO output (id, name, load_id, row_hash)\n'\
+        'SELECT u.id, u.title, u.load_id, u.row_hash\n')
+    condition = '(row_hash <> VALUES(row_hash) OR row_hash IS NULL)'
+    assert code.endswith(
+        'ON DUPLICATE KEY UPDATE '\
+        f'name = IF({condition}, VALUES(name), name), '\
+        f'update_id = IF({condition}, 5, update_id), '\
+        f'row_hash = IF({condition}, VALUES(row_hash), row_hash)')
+
+def test_update_mysql():
+    code = render(get_update(), mysql)
+    assert code.startswith('UPDATE output t\nJOIN (SELECT')
+    assert 'ON t.id = u.id\n'\
+        'SET t.name = u.title, t.update_id = u.update_id, '\
+        't.row_hash = u.row_hash\n' in code
+    assert code.endswith(
+        'WHERE (t.row_hash <> u.row_hash OR t.row_hash IS NULL)')
+
+@pytest.mark.parametrize('statement', [get_merge, get_update])
+def test_unsupported_dialect(statement):
+    with pytest.raises(CompileError):
+        render(statement(), mssql)
+
+def test_merge_sqlite_execution():
+    engine = sql.create_engine('sqlite://')
+    metadata.create_all(engine)
+    connection = engine.connect()
+    connection.execute(
+        output.insert(), [
+            {'id': 1, 'name': 'a', 'row_hash': 'x', 'load_id': 1},
+            {'id': 2, 'name': 'b', 'row_hash': 'y', 'load_id': 1}])
+    connection.execute(
+        medium.insert(), [
+            {'id': 1, 'title': 'a', 'row_hash': 'x'},
+            {'id': 2, 'title': 'c', 'row_hash': 'z'},
+            {'id': 3, 'title': 'd', 'row_hash': 'w'}])
+
+    connection.execute(get_merge(load_id=2))
+    select = sql.select([output]).order_by(output.c.id)
+    assert connection.execute(select).fetchall() == [
+        (1, 'a', 'x', 1, None),
+        (2, 'c', 'z', 1, 2),
+        (3, 'd', 'w', 2, None)]
+    connection.close()
+
+@pytest.mark.parametrize('dialect', [oracle, postgresql, sqlite, mysql])
+@pytest.mark.parametrize('statement', [get_merge, get_update])
+def test_using_unique_by_keys(dialect, statement):
+    code = render(statement(), dialect)
+    assert 'SELECT u.*, ROW_NUMBER() OVER '\
+        '(PARTITION BY u.id ORDER BY u.id) AS etl_row_number\n' in code
+    assert 'u) u\nWHERE etl_row_number = 1) u\n' in code
+
+def test_using_ordered():
+    merge = dml.merge(
+        output, get_using(), ['id'], ['update_id'], ['id', 'load_id'],
+        order=['row_hash'])
+    code = render(merge.prefix_with('/*+ APPEND */', dialect='oracle'), oracle)
+    assert code.startswith('MERGE /*+ APPEND */ INTO output t')
+    assert '(PARTITION BY u.id ORDER BY u.row_hash DESC)' in code
+
+def test_repeated_keys_sqlite_execution():
+    engine = sql.create_engine('sqlite://')
+    metadata.create_all(engine)
+    connection = engine.connect()
+    connection.execute(
+        output.insert(), [{'id': 1, 'name': 'a', 'row_hash': 'x'}])
+    connection.execute(
+        medium.insert(), [
+            {'id': 1, 'title': 'b', 'row_hash': 'y'},
+            {'id': 1, 'title': 'c', 'row_hash': 'z'},
+            {'id': 2, 'title': 'd', 'row_hash': 'v'},
+            {'id': 2, 'title': 'e', 'row_hash': 'w'}])
+    rowid = sql.literal_column('medium.rowid').label('etl_rowid')
+    using = get_using(2).column(rowid)
+
+    merge = dml.merge(
+        output, using, ['id'], [['name', 'title'], 'update_id'],
+        ['id', ['name', 'title'], 'load_id'], order=['etl_rowid'])
+    connection.execute(merge)
+    select = sql.select([output.c.id, output.c.name]).order_by(output.c.id)
+    assert connection.execute(select).fetchall() == [(1, 'c'), (2, 'e')]
+
+    connection.execute(medium.insert(), [{'id': 2, 'title': 'f'}])
+    update = dml.update(
+        output, using, ['id'], [['name', 'title']], order=['etl_rowid'])
+    connection.execute(update)
+    assert connection.execute(select).fetchall() == [(1, 'c'), (2, 'f')]
+    connection.close()
@@ -0,0 +1,60 @@
+import pytest
+import sqlalchemy as sql
+
+from sqlalchemy.exc import CompileError
+from sqlalchemy.dialects import oracle, postgresql, mysql, sqlite
+
+from pypyrus_etl.nodes.database import func
+
+metadata = sql.MetaData()
+table = sql.Table(
+    't', metadata,
+    sql.Column('a', sql.Integer),
+    sql.Column('b', sql.String(10)),
+    sql.Column('c', sql.DateTime),
+    sql.Column('d', sql.Date),
+    sql.Column('e', sql.Numeric(10, 2)),
+    sql.Column('f', sql.TIMESTAMP))
+
+def render(expression, dialect):
+    return str(expression.compile(dialect=dialect.dialect()))
+
+def get_part(value, length='LENGTH', concat='||'):
+    if concat is None:
+        part = f"CONCAT({length}({value}), ':', {value})"
+    else:
+        part = f"{length}({value}) {concat} ':' {concat} {value}"
+    return f"COALESCE({part}, '-')"
+
+def test_row_hash_oracle():
+    code = render(func.row_hash(*table.columns), oracle)
+    number = "'TM9', 'NLS_NUMERIC_CHARACTERS=''.,'''"
+    parts = [
+        get_part(f'TO_CHAR(t.a, {number})'),
+        get_part('TO_CHAR(t.b)'),
+        get_part("TO_CHAR(t.c, 'YYYY-MM-DD HH24:MI:SS')"),
+        get_part("TO_CHAR(t.d, 'YYYY-MM-DD HH24:MI:SS')"),
+        get_part(f'TO_CHAR(t.e, {number})'),
+        get_part("TO_CHAR(t.f, 'YYYY-MM-DD HH24:MI:SS.FF9')")]
+    assert code == f"RAWTOHEX(STANDARD_HASH({' || '.join(parts)}, 'MD5'))"
+
+def test_row_hash_postgresql():
+    code = render(func.row_hash(table.c.a, table.c.b), postgresql)
+    assert code == 'MD5(ROW(t.a, t.b)::TEXT)'
+
+def test_row_hash_mysql():
+    code = render(func.row_hash(table.c.a, table.c.b), mysql)
+    parts = [
+        get_part(f'CAST(t.{name} AS CHAR)', 'CHAR_LENGTH', None)
+        for name in ['a', 'b']]
+    assert code == f"MD5(CONCAT({', '.join(parts)}))"
+
+def test_row_hash_marks_null_apart_from_empty():
+    # Empty value has the zero length so it is not the null mark.
+    code = render(func.row_hash(table.c.b), mysql)
+    assert "CONCAT(CHAR_LENGTH(CAST(t.b AS CHAR)), ':'" in code
+    assert code.endswith(", '-')))")
+
+def test_row_hash_unsupported():
+    with pytest.raises(CompileError):
+        render(func.row_hash(table.c.a), sqlite)